@@ -0,0 +1,656 @@
+"""
+Video analysis module using MediaPipe Pose for sports integrity checking.
+Implements rep counting and cheat detection for push-ups and sit-ups.
+"""
+
+import collections
+import cv2
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+import math
+import os
+import queue
+import threading
+
+try:
+    import av
+except ImportError:  # PyAV is optional; decoding falls back to cv2.VideoCapture
+    av = None
+
+from .utils import compute_frame_mse, get_centroid, landmarks_to_array
+from .analyze_kernels import compile_kernels, pushup_angle
+
+# Configuration constants
+SAMPLE_RATE = 2  # Process every Nth frame
+DOWNSCALE = 0.75  # Scale down frames for faster processing
+MSE_THRESHOLD = 100.0  # Frame duplication detection threshold
+MSE_THUMB_SIZE = (64, 64)  # Thumbnail used to rule out duplicates cheaply
+FACE_CENTROID_VARIANCE_THRESHOLD = 0.01  # Face consistency threshold
+FACE_SAMPLE_RATE = 5  # Run FaceMesh on every Nth processed frame
+# Face detections needed before the variance is trusted; scaled with
+# FACE_SAMPLE_RATE so short clips reach the check as before sampling
+FACE_MIN_DETECTIONS = max(1, 5 // FACE_SAMPLE_RATE)
+REP_RATE_THRESHOLD = 3.0  # Max reps per second (physiological limit)
+FRAME_QUEUE_SIZE = 8  # Decoded frames buffered ahead of pose inference
+ANGLE_HISTORY_SIZE = 10  # Recent push-up elbow angles kept by RepCounter
+POSTURE_BUFFER_SIZE = 16384  # Initial posture score capacity, doubled as needed
+HWACCEL_DEVICE_TYPES = ("videotoolbox", "cuda", "vaapi")  # PyAV decoders to try
+# FFmpeg decode threads per video; each server worker process decodes its own
+AV_DECODE_THREADS = 2
+
+# Exercise-specific thresholds
+PUSHUP_ANGLE_THRESHOLD = 90.0  # Elbow angle for push-up down position
+SITUP_TORSO_THRESHOLD = 0.15  # Torso vertical displacement threshold
+
+# MediaPipe Pose landmark indices used by each exercise
+PUSHUP_LANDMARKS = (11, 12, 13, 14, 15, 16)  # Shoulders, elbows, wrists
+SITUP_LANDMARKS = (11, 12, 23, 24)  # Shoulders, hips
+
+# Optional MediaPipe Tasks pose model (e.g. pose_landmarker_full.task). When
+# set, pose runs through PoseLandmarker in VIDEO mode instead of mp.solutions
+POSE_MODEL_PATH = os.getenv("POSE_MODEL_PATH")
+
+
+def _create_pose_landmarker(model_path: str):
+    """Build a Tasks PoseLandmarker that tracks one pose across video frames."""
+    import mediapipe as mp
+    
+    vision = mp.tasks.vision
+    options = vision.PoseLandmarkerOptions(
+        base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
+        running_mode=vision.RunningMode.VIDEO,
+        num_poses=1,
+        min_pose_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+    return vision.PoseLandmarker.create_from_options(options)
+
+
+# Shared MediaPipe graphs. Building them loads the model weights, so they are
+# created once per process, on first use, by get_pose(); solution objects are
+# not thread-safe, so every use goes through _POSE_LOCK.
+_POSE = None
+_FACE_MESH = None
+_MODELS_LOCK = threading.Lock()  # Guards the one-time build in get_pose()
+_POSE_LOCK = threading.Lock()
+
+# Last timestamp fed to a PoseLandmarker; VIDEO mode rejects timestamps that
+# do not increase, including across videos
+_last_pose_timestamp_ms = 0
+
+
+class RepCounter:
+    """State machine for counting repetitions."""
+    
+    def __init__(self, exercise_type: str):
+        self.exercise_type = exercise_type.lower()
+        self.state = "up"  # "up" or "down"
+        self.rep_count = 0
+        self.valid_reps = 0
+        self.last_angles = collections.deque(maxlen=ANGLE_HISTORY_SIZE)
+        self.posture_scores = np.empty(POSTURE_BUFFER_SIZE, dtype=np.float32)
+        self.n_scores = 0
+        
+    def update(self, landmarks) -> bool:
+        """
+        Update state and return True if a rep was completed.
+        
+        Accepts an (N, 2) array of landmark (x, y) rows, a structured array
+        with x and y fields, or a sequence of landmark objects with .x and
+        .y attributes.
+        """
+        if landmarks is None or len(landmarks) == 0:
+            return False
+        
+        if self.exercise_type == "pushup":
+            indices = PUSHUP_LANDMARKS
+        elif self.exercise_type == "situp":
+            indices = SITUP_LANDMARKS
+        else:
+            return False
+        
+        try:
+            if isinstance(landmarks, np.ndarray):
+                # Already a landmark array, just take our rows
+                pts = landmarks[list(indices)]
+                if pts.dtype.names:
+                    pts = landmarks_to_array(pts)
+            else:
+                # Gather the (x, y) rows this exercise needs into one array
+                pts = np.fromiter(
+                    (v for i in indices for v in (landmarks[i].x, landmarks[i].y)),
+                    dtype=np.float32,
+                    count=len(indices) * 2
+                ).reshape(-1, 2)
+        except (IndexError, AttributeError):
+            return False
+        
+        if self.exercise_type == "pushup":
+            return self._update_pushup(pts)
+        return self._update_situp(pts)
+    
+    def _update_pushup(self, pts: np.ndarray) -> bool:
+        """Update push-up counter based on elbow angle."""
+        # Rows are shoulders, elbows, wrists as (left, right) pairs
+        avg_angle = pushup_angle(pts)
+        
+        self.last_angles.append(avg_angle)
+        
+        # Calculate posture score (how close to ideal form)
+        ideal_angle_down = 80.0
+        ideal_angle_up = 160.0
+        
+        if self.state == "down":
+            deviation = abs(avg_angle - ideal_angle_down) / ideal_angle_down
+        else:
+            deviation = abs(avg_angle - ideal_angle_up) / ideal_angle_up
+            
+        posture_score = max(0.0, 1.0 - deviation)
+        self._record_posture_score(posture_score)
+        
+        # State machine logic
+        rep_completed = False
+        if self.state == "up" and avg_angle < PUSHUP_ANGLE_THRESHOLD:
+            self.state = "down"
+        elif self.state == "down" and avg_angle > PUSHUP_ANGLE_THRESHOLD + 20:
+            self.state = "up"
+            self.rep_count += 1
+            
+            # Validate rep quality
+            if posture_score > 0.6:  # Minimum posture threshold
+                self.valid_reps += 1
+                
+            rep_completed = True
+            
+        return rep_completed
+    
+    def _update_situp(self, pts: np.ndarray) -> bool:
+        """Update sit-up counter based on torso angle."""
+        # Rows are shoulders then hips as (left, right) pairs
+        shoulder_mid = pts[0:2].mean(axis=0)
+        hip_mid = pts[2:4].mean(axis=0)
+        
+        # Calculate torso vertical displacement
+        torso_vector = shoulder_mid - hip_mid
+        vertical_component = abs(float(torso_vector[1]))
+        horizontal_component = abs(float(torso_vector[0]))
+        
+        # Calculate posture score based on spine alignment
+        spine_straightness = 1.0 - horizontal_component / max(vertical_component, 0.1)
+        posture_score = max(0.0, min(1.0, spine_straightness))
+        self._record_posture_score(posture_score)
+        
+        # State machine logic
+        rep_completed = False
+        if self.state == "down" and vertical_component < SITUP_TORSO_THRESHOLD:
+            self.state = "up"
+            self.rep_count += 1
+            
+            # Validate rep quality
+            if posture_score > 0.5:
+                self.valid_reps += 1
+                
+            rep_completed = True
+        elif self.state == "up" and vertical_component > SITUP_TORSO_THRESHOLD + 0.05:
+            self.state = "down"
+            
+        return rep_completed
+    
+    def _record_posture_score(self, posture_score: float) -> None:
+        """Append a score to the packed buffer, doubling it when full."""
+        if self.n_scores == len(self.posture_scores):
+            grown = np.empty(len(self.posture_scores) * 2, dtype=np.float32)
+            grown[:self.n_scores] = self.posture_scores
+            self.posture_scores = grown
+        self.posture_scores[self.n_scores] = posture_score
+        self.n_scores += 1
+    
+    def get_average_posture_score(self) -> float:
+        """Get average posture score."""
+        if self.n_scores == 0:
+            return 0.0
+        return float(self.posture_scores[:self.n_scores].mean(dtype=np.float64))
+
+
+def get_pose():
+    """
+    Return the shared (pose, face_mesh) MediaPipe graphs, building them once.
+    
+    mediapipe is imported here rather than at module load, so importing this
+    module (and starting the API) does not pay for it. pose is a Tasks
+    PoseLandmarker when POSE_MODEL_PATH is set, otherwise an mp.solutions
+    Pose graph.
+    """
+    global _POSE, _FACE_MESH
+    
+    with _MODELS_LOCK:
+        if _POSE is None:
+            import mediapipe as mp
+            
+            if POSE_MODEL_PATH:
+                _POSE = _create_pose_landmarker(POSE_MODEL_PATH)
+            else:
+                _POSE = mp.solutions.pose.Pose(
+                    static_image_mode=False,
+                    model_complexity=1,
+                    enable_segmentation=False,
+                    min_detection_confidence=0.5,
+                    min_tracking_confidence=0.5
+                )
+            
+            _FACE_MESH = mp.solutions.face_mesh.FaceMesh(
+                static_image_mode=False,
+                max_num_faces=1,
+                refine_landmarks=False,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+    
+    return _POSE, _FACE_MESH
+
+
+def _detect_pose(pose, rgb_frame: np.ndarray, timestamp_ms: int):
+    """
+    Run pose detection on one RGB frame with the graph from get_pose().
+    
+    Returns the detected pose's landmark sequence, or None. Callers must
+    hold _POSE_LOCK.
+    """
+    global _last_pose_timestamp_ms
+    
+    if not POSE_MODEL_PATH:
+        pose_results = pose.process(rgb_frame)
+        if not pose_results.pose_landmarks:
+            return None
+        return pose_results.pose_landmarks.landmark
+    
+    import mediapipe as mp
+    
+    image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+    pose_results = pose.detect_for_video(image, timestamp_ms)
+    _last_pose_timestamp_ms = timestamp_ms
+    if not pose_results.pose_landmarks:
+        return None
+    return pose_results.pose_landmarks[0]
+
+
+def warm_up_models() -> None:
+    """Run a dummy frame through the shared models so the first request is fast."""
+    compile_kernels()
+    pose, face_mesh = get_pose()
+    dummy_frame = np.zeros((64, 64, 3), dtype=np.uint8)
+    with _POSE_LOCK:
+        _detect_pose(pose, dummy_frame, _last_pose_timestamp_ms + 1)
+        face_mesh.process(dummy_frame)
+
+
+def _read_frames(
+    cap,
+    frame_size: Tuple[int, int],
+    frame_queue: queue.Queue,
+    stop_event: threading.Event,
+    errors: List[Exception]
+) -> None:
+    """
+    Decode, downscale and convert sampled frames on a background thread.
+    
+    frame_size is the size requested from the capture; frames that arrive
+    at any other size are resized by DOWNSCALE. Pushes (frame_index,
+    bgr_frame, rgb_frame) tuples onto the queue and a trailing None sentinel
+    once the video is exhausted or decoding fails. A failure is recorded in
+    errors for analyze_video to re-raise.
+    """
+    frame_index = 0
+    
+    try:
+        while cap.isOpened() and not stop_event.is_set():
+            # grab() only demuxes; the decode happens in retrieve()
+            ret = cap.grab()
+            if not ret:
+                break
+                
+            frame_index += 1
+            
+            # Sample frames to speed up processing
+            if frame_index % SAMPLE_RATE != 0:
+                continue
+                
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+                
+            # Downscale here if the backend ignored the requested frame size
+            height, width = frame.shape[:2]
+            if DOWNSCALE != 1.0 and (width, height) != frame_size:
+                new_width = int(width * DOWNSCALE)
+                new_height = int(height * DOWNSCALE)
+                frame = cv2.resize(frame, (new_width, new_height))
+            
+            # Convert to RGB for MediaPipe
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            
+            frame_queue.put((frame_index, frame, rgb_frame))
+    except Exception as e:
+        errors.append(e)
+    finally:
+        frame_queue.put(None)
+
+
+def _configure_av_decoder(container) -> None:
+    """Set up the video decoder's threads, which PyAV only allows before the first decode."""
+    stream = container.streams.video[0]
+    stream.thread_type = "AUTO"  # Let FFmpeg decode with frame and slice threads
+    stream.thread_count = AV_DECODE_THREADS
+
+
+def _open_av_container(video_path: str):
+    """
+    Open a video with PyAV, on the first hardware decoder that initializes.
+    
+    Returns None when PyAV is not installed or cannot open the file, in which
+    case the caller decodes with cv2.VideoCapture instead. The decoder is
+    configured before the hardware probe opens it, so the container comes
+    back ready to decode.
+    """
+    if av is None:
+        return None
+    
+    # hwdevices_available() lists what FFmpeg was built with, not what this
+    # machine has, so each candidate is probed by opening and decoding
+    available = av.codec.hwaccel.hwdevices_available()
+    for device_type in HWACCEL_DEVICE_TYPES:
+        if device_type not in available:
+            continue
+        try:
+            container = av.open(
+                video_path,
+                hwaccel=av.codec.hwaccel.HWAccel(device_type=device_type)
+            )
+        except av.FFmpegError:
+            continue
+        try:
+            _configure_av_decoder(container)
+            next(container.decode(video=0))
+        except (av.FFmpegError, IndexError, StopIteration):
+            container.close()
+            continue
+        container.seek(0)
+        return container
+    
+    try:
+        container = av.open(video_path)
+    except av.FFmpegError:
+        return None
+    try:
+        _configure_av_decoder(container)
+    except IndexError:  # No video stream
+        container.close()
+        return None
+    return container
+
+
+def _av_video_info(container) -> Tuple[float, int, int, int]:
+    """
+    (fps, total_frames, width, height) of a PyAV container's video stream,
+    as cv2.VideoCapture reports them.
+    
+    Containers without a frame count in their header get one estimated from
+    the duration, like cv2 does.
+    """
+    stream = container.streams.video[0]
+    fps = float(stream.guessed_rate or 0)
+    total_frames = stream.frames
+    if not total_frames and container.duration and fps > 0:
+        total_frames = round(container.duration / av.time_base * fps)
+    return fps, total_frames, stream.codec_context.width, stream.codec_context.height
+
+
+def _read_frames_av(
+    container,
+    frame_size: Tuple[int, int],
+    frame_queue: queue.Queue,
+    stop_event: threading.Event,
+    errors: List[Exception]
+) -> None:
+    """
+    PyAV counterpart of _read_frames, decoding straight to RGB.
+    
+    Every frame still has to be decoded, but only sampled ones are converted
+    out of the decoder's pixel format. The RGB frame is queued in both the
+    bgr_frame and rgb_frame slots; frame MSE does not depend on channel order.
+    """
+    frame_index = 0
+    
+    try:
+        stream = container.streams.video[0]
+        for av_frame in container.decode(stream):
+            if stop_event.is_set():
+                break
+                
+            frame_index += 1
+            
+            # Sample frames to speed up processing
+            if frame_index % SAMPLE_RATE != 0:
+                continue
+                
+            # Convert with swscale's default matrix, not the stream's tagged
+            # one, so frames match what cv2.VideoCapture would have produced
+            rgb_frame = av_frame.to_ndarray(format="rgb24", src_colorspace="DEFAULT")
+            
+            height, width = rgb_frame.shape[:2]
+            if DOWNSCALE != 1.0 and (width, height) != frame_size:
+                new_width = int(width * DOWNSCALE)
+                new_height = int(height * DOWNSCALE)
+                rgb_frame = cv2.resize(rgb_frame, (new_width, new_height))
+            
+            frame_queue.put((frame_index, rgb_frame, rgb_frame))
+    except Exception as e:
+        errors.append(e)
+    finally:
+        container.close()
+        frame_queue.put(None)
+
+
+def face_centroid_variance(face_detections: int, face_m2: np.ndarray) -> Optional[float]:
+    """
+    Face centroid variance from Welford's sum of squared deviations.
+    
+    Population variance per axis, averaged over x and y, or None when there
+    are too few detections for it to mean anything.
+    """
+    if face_detections <= FACE_MIN_DETECTIONS:
+        return None
+    return float((face_m2 / face_detections).mean())
+
+
+def analyze_video(video_path: str, test_type: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Analyze video for sports integrity using MediaPipe Pose.
+    
+    Args:
+        video_path: Path to video file
+        test_type: Type of exercise ('pushup' or 'situp')
+        
+    Returns:
+        Analysis results dictionary
+    """
+    
+    # Open video through PyAV (hardware decode where available) when it is
+    # installed, and through cv2.VideoCapture otherwise
+    cap = None
+    container = _open_av_container(video_path)
+    if container is not None:
+        fps, total_frames, width, height = _av_video_info(container)
+        frame_size = (int(width * DOWNSCALE), int(height * DOWNSCALE))
+    else:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            return {"error": "Could not open video file"}
+        
+        # Get video properties
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        
+        # Ask the decoder for downscaled frames; backends that honor this
+        # skip the per-frame resize
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        frame_size = (int(width * DOWNSCALE), int(height * DOWNSCALE))
+        if DOWNSCALE != 1.0:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_size[0])
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_size[1])
+    duration = total_frames / fps if fps > 0 else 0
+    
+    # Initialize analysis components
+    if test_type:
+        rep_counter = RepCounter(test_type)
+    else:
+        rep_counter = RepCounter("pushup")  # Default
+    
+    # Cheat detection variables
+    previous_frame = None
+    previous_thumb = None
+    duplicate_frames = 0
+    # Running mean and sum of squared deviations of face centroids (Welford)
+    face_detections = 0
+    face_mean = np.zeros(2)
+    face_m2 = np.zeros(2)
+    rep_timestamps = []
+    
+    frames_processed = 0
+    notes = []
+    
+    # Decode on a background thread so it overlaps with pose inference
+    frame_queue = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+    stop_event = threading.Event()
+    read_errors = []
+    if container is not None:
+        reader = threading.Thread(
+            target=_read_frames_av,
+            args=(container, frame_size, frame_queue, stop_event, read_errors),
+            daemon=True
+        )
+    else:
+        reader = threading.Thread(
+            target=_read_frames,
+            args=(cap, frame_size, frame_queue, stop_event, read_errors),
+            daemon=True
+        )
+    
+    # The shared MediaPipe graphs are stateful, so one video at a time
+    pose, face_mesh = get_pose()
+    with _POSE_LOCK:
+        # Drop tracking state left over from the previous video
+        if not POSE_MODEL_PATH:
+            pose.reset()
+        face_mesh.reset()
+        # Start this video's landmarker timestamps after the previous video's
+        timestamp_base_ms = _last_pose_timestamp_ms + 1000
+        reader.start()
+        
+        try:
+            while True:
+                item = frame_queue.get()
+                if item is None:
+                    break
+                    
+                frame_index, frame, rgb_frame = item
+                frames_processed += 1
+                current_time = frame_index / fps
+                
+                # Frame duplication detection. Area-averaged thumbnails can
+                # only under-estimate the full-frame MSE (plus rounding), so
+                # a clearly different thumbnail skips the full compare
+                thumb = cv2.resize(frame, MSE_THUMB_SIZE, interpolation=cv2.INTER_AREA)
+                if previous_frame is not None:
+                    thumb_mse = compute_frame_mse(thumb, previous_thumb)
+                    if thumb_mse <= MSE_THRESHOLD * 2:
+                        mse = compute_frame_mse(frame, previous_frame)
+                        if mse < MSE_THRESHOLD:
+                            duplicate_frames += 1
+                previous_frame = frame  # Fresh buffer per frame, never mutated
+                previous_thumb = thumb
+                
+                # Pose detection
+                pose_landmarks = _detect_pose(
+                    pose, rgb_frame, timestamp_base_ms + int(current_time * 1000)
+                )
+                
+                if pose_landmarks is not None:
+                    # Read the landmarks into one array per frame
+                    landmarks = landmarks_to_array(pose_landmarks)
+                    
+                    # Update rep counter
+                    if rep_counter.update(landmarks):
+                        rep_timestamps.append(current_time)
+                
+                # Face detection for consistency check; centroid variance is a
+                # whole-video statistic, so a subset of frames is enough
+                if frames_processed % FACE_SAMPLE_RATE == 0:
+                    face_results = face_mesh.process(rgb_frame)
+                    if face_results.multi_face_landmarks:
+                        for face_landmarks in face_results.multi_face_landmarks:
+                            centroid = get_centroid(face_landmarks.landmark)
+                            face_detections += 1
+                            delta = centroid - face_mean
+                            face_mean += delta / face_detections
+                            face_m2 += delta * (centroid - face_mean)
+        finally:
+            # Unblock the reader if we stopped early, then wait for it to exit
+            stop_event.set()
+            while reader.is_alive():
+                try:
+                    frame_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            reader.join()
+            # The PyAV reader closes its container itself
+            if cap is not None:
+                cap.release()
+    
+    # The reader queues its sentinel even when decoding fails, so surface why
+    if read_errors:
+        raise read_errors[0]
+    
+    # Calculate cheat detection metrics
+    cheat_flags = []
+    
+    # 1. Frame duplication check
+    duplicate_ratio = duplicate_frames / max(frames_processed, 1)
+    if duplicate_ratio > 0.15:  # More than 15% duplicate frames
+        cheat_flags.append("excessive_frame_duplication")
+        notes.append(f"High frame duplication detected: {duplicate_ratio:.2%}")
+    
+    # 2. Face consistency check
+    face_variance = face_centroid_variance(face_detections, face_m2)
+    if face_variance is not None and face_variance > FACE_CENTROID_VARIANCE_THRESHOLD:
+        cheat_flags.append("face_inconsistency")
+        notes.append(f"Face position inconsistency detected: {face_variance:.4f}")
+    
+    # 3. Unphysiological rep rate check
+    if len(rep_timestamps) > 1 and duration > 0:
+        rep_rate = len(rep_timestamps) / duration
+        if rep_rate > REP_RATE_THRESHOLD:
+            cheat_flags.append("excessive_rep_rate")
+            notes.append(f"Unphysiological rep rate: {rep_rate:.2f} reps/sec")
+    
+    # Compile results
+    result = {
+        "reps": rep_counter.rep_count,
+        "valid_reps": rep_counter.valid_reps,
+        "posture_score": round(rep_counter.get_average_posture_score(), 3),
+        "cheat_flag": len(cheat_flags) > 0,
+        "cheat_reasons": cheat_flags,
+        "notes": notes,
+        "frames_processed": frames_processed,
+        "duration": round(duration, 2),
+        "analysis_metadata": {
+            "sample_rate": SAMPLE_RATE,
+            "downscale": DOWNSCALE,
+            "duplicate_frames": duplicate_frames,
+            "face_detections": face_detections,
+            "rep_timestamps": rep_timestamps
+        }
+    }
+    
+    return result
\ No newline at end of file
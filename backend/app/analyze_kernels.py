@@ -0,0 +1,53 @@
+"""
+Numba-compiled kernels for the per-frame math in video analysis.
+The inputs are a handful of landmarks, so NumPy call overhead would
+dominate the arithmetic; these run as straight-line native code instead.
+"""
+
+import math
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True, error_model="numpy")
+def joint_angle(ax: float, ay: float, bx: float, by: float, cx: float, cy: float) -> float:
+    """Angle in degrees at point b between the segments b->a and b->c."""
+    v1x = ax - bx
+    v1y = ay - by
+    v2x = cx - bx
+    v2y = cy - by
+    
+    norm = math.sqrt(v1x * v1x + v1y * v1y) * math.sqrt(v2x * v2x + v2y * v2y)
+    cos_angle = (v1x * v2x + v1y * v2y) / norm
+    cos_angle = min(max(cos_angle, -1.0 + 1e-7), 1.0 - 1e-7)
+    
+    return math.degrees(math.acos(cos_angle))
+
+
+@njit(cache=True, error_model="numpy")
+def pushup_angle(pts: np.ndarray) -> float:
+    """
+    Average elbow angle for push-up analysis.
+    
+    Args:
+        pts: (6, 2) array of shoulders, elbows, wrists as (left, right) pairs
+        
+    Returns:
+        Mean of the left and right elbow angles in degrees
+    """
+    left_angle = joint_angle(pts[0, 0], pts[0, 1], pts[2, 0], pts[2, 1], pts[4, 0], pts[4, 1])
+    right_angle = joint_angle(pts[1, 0], pts[1, 1], pts[3, 0], pts[3, 1], pts[5, 0], pts[5, 1])
+    return (left_angle + right_angle) / 2
+
+
+def compile_kernels() -> None:
+    """
+    Compile the kernels for the float32 landmark arrays RepCounter uses.
+    
+    Called from warm_up_models so the JIT cost is paid off the request path
+    rather than at import or on the first analyzed frame.
+    """
+    pushup_angle(np.array(
+        [[0.3, 0.3], [0.7, 0.3], [0.2, 0.4], [0.8, 0.4], [0.1, 0.5], [0.9, 0.5]],
+        dtype=np.float32
+    ))
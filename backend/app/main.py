@@ -5,22 +5,31 @@ Handles video uploads, analysis, and overlay generation.
 
 import os
 import json
-from typing import Optional, Dict, Any
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Tuple
 from pathlib import Path
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 import uvicorn
 
-from .utilss import (
+from .utils import (
     create_job_id, 
-    save_video_file, 
+    save_video_stream, 
     save_result_json, 
     load_result_json,
-    get_video_info
+    read_json_file,
+    append_result_index,
+    compact_result_index,
+    load_result_index,
+    get_video_info,
+    parse_byte_range,
+    iter_file_range,
+    RESULTS_INDEX_COMPACT_THRESHOLD
 )
-from .analyzee import analyze_video
+from .analyze import analyze_video, warm_up_models
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -43,6 +52,48 @@ os.makedirs("data/videos", exist_ok=True)
 os.makedirs("data/overlays", exist_ok=True)
 os.makedirs("data/results", exist_ok=True)
 
+# analyze_video is CPU-bound and serialized on the shared MediaPipe graphs,
+# so it runs on one dedicated worker thread instead of the event loop
+analysis_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis")
+
+# Server processes for `python -m app.main`, set with WEB_CONCURRENCY as for
+# the uvicorn CLI. Each loads its own Pose and FaceMesh graphs (about 200 MB
+# resident) and analysis executor, so memory usually limits it before cores
+SERVER_WORKERS = int(os.getenv("WEB_CONCURRENCY", "2"))
+
+# /list summaries keyed by job_id, stored with the result file's mtime so
+# unchanged files are never re-parsed
+_list_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+
+@app.on_event("startup")
+async def warm_up():
+    """Load the MediaPipe models in the background ahead of the first analysis."""
+    # Queued on the analysis executor rather than awaited, so startup (and
+    # /health, /list) does not wait on the model load while the first
+    # /analyze still runs after it
+    asyncio.get_running_loop().run_in_executor(analysis_executor, warm_up_models)
+
+
+@app.on_event("startup")
+async def load_list_cache():
+    """Seed the /list cache from the results index instead of every result file."""
+    entries = load_result_index()
+    for entry in entries:
+        _list_cache[entry["job_id"]] = (entry["mtime"], entry["summary"])
+    
+    # Forget results whose files have been removed
+    for job_id in list(_list_cache):
+        if not os.path.exists(f"data/results/{job_id}.json"):
+            del _list_cache[job_id]
+    
+    # The index is append-only, so rewrite it once enough lines are stale
+    if len(entries) - len(_list_cache) > RESULTS_INDEX_COMPACT_THRESHOLD:
+        compact_result_index([
+            {"job_id": job_id, "mtime": mtime, "summary": summary}
+            for job_id, (mtime, summary) in _list_cache.items()
+        ])
+
 
 @app.get("/")
 async def root():
@@ -88,8 +139,7 @@ async def analyze_video_endpoint(
     try:
         # Generate job ID and save file
         job_id = create_job_id()
-        file_content = await file.read()
-        video_path = save_video_file(file_content, job_id)
+        video_path = await save_video_stream(file, job_id)
         
         # Parse athlete metadata if provided
         athlete_data = {}
@@ -104,8 +154,11 @@ async def analyze_video_endpoint(
         if "error" in video_info:
             raise HTTPException(status_code=400, detail=video_info["error"])
         
-        # Perform analysis
-        analysis_result = analyze_video(video_path, test_type)
+        # Perform analysis off the event loop
+        loop = asyncio.get_running_loop()
+        analysis_result = await loop.run_in_executor(
+            analysis_executor, analyze_video, video_path, test_type
+        )
         
         if "error" in analysis_result:
             raise HTTPException(status_code=500, detail=analysis_result["error"])
@@ -122,8 +175,9 @@ async def analyze_video_endpoint(
             "status": "completed"
         }
         
-        # Save result
-        save_result_json(complete_result, job_id)
+        # Save result and make it visible to /list without a re-parse
+        result_path = save_result_json(complete_result, job_id)
+        cache_summary(job_id, os.path.getmtime(result_path), summarize_result(complete_result))
         
         return JSONResponse(content=complete_result)
         
@@ -142,6 +196,26 @@ async def get_result(job_id: str):
     return JSONResponse(content=result)
 
 
+def summarize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a full analysis result to the summary shown by /list."""
+    return {
+        "job_id": result.get("job_id"),
+        "filename": result.get("filename"),
+        "timestamp": result.get("timestamp"),
+        "test_type": result.get("test_type"),
+        "reps": result.get("analysis", {}).get("reps", 0),
+        "valid_reps": result.get("analysis", {}).get("valid_reps", 0),
+        "cheat_flag": result.get("analysis", {}).get("cheat_flag", False),
+        "status": result.get("status")
+    }
+
+
+def cache_summary(job_id: str, mtime: float, summary: Dict[str, Any]) -> None:
+    """Store a result summary in memory and in the on-disk index."""
+    _list_cache[job_id] = (mtime, summary)
+    append_result_index({"job_id": job_id, "mtime": mtime, "summary": summary})
+
+
 @app.get("/list")
 async def list_results():
     """List all processed videos and their results."""
@@ -149,26 +223,26 @@ async def list_results():
     results = []
     results_dir = Path("data/results")
     
+    seen = set()
     if results_dir.exists():
         for result_file in results_dir.glob("*.json"):
+            job_id = result_file.stem
             try:
-                with open(result_file, "r") as f:
-                    result = json.load(f)
-                    # Include only summary information
-                    summary = {
-                        "job_id": result.get("job_id"),
-                        "filename": result.get("filename"),
-                        "timestamp": result.get("timestamp"),
-                        "test_type": result.get("test_type"),
-                        "reps": result.get("analysis", {}).get("reps", 0),
-                        "valid_reps": result.get("analysis", {}).get("valid_reps", 0),
-                        "cheat_flag": result.get("analysis", {}).get("cheat_flag", False),
-                        "status": result.get("status")
-                    }
-                    results.append(summary)
+                mtime = result_file.stat().st_mtime
+                cached = _list_cache.get(job_id)
+                if cached is None or cached[0] != mtime:
+                    result = read_json_file(str(result_file))
+                    cache_summary(job_id, mtime, summarize_result(result))
             except Exception as e:
                 print(f"Error reading result file {result_file}: {e}")
                 continue
+            
+            seen.add(job_id)
+            results.append(_list_cache[job_id][1])
+    
+    # Forget results whose files have been removed
+    for job_id in set(_list_cache) - seen:
+        del _list_cache[job_id]
     
     # Sort by timestamp (newest first)
     results.sort(key=lambda x: x.get("timestamp", 0), reverse=True)
@@ -176,34 +250,71 @@ async def list_results():
     return {"results": results, "count": len(results)}
 
 
+def video_file_response(request: Request, path: str, filename: str):
+    """
+    Serve a video file, answering Range requests with 206 partial content.
+    
+    Whole-file replies go through FileResponse with the stat we already
+    have, so it can stream from the page cache without a second stat.
+    """
+    stat_result = os.stat(path)
+    file_size = stat_result.st_size
+    headers = {"Accept-Ranges": "bytes"}
+    
+    range_header = request.headers.get("range")
+    if range_header:
+        try:
+            byte_range = parse_byte_range(range_header, file_size)
+        except ValueError:
+            raise HTTPException(
+                status_code=416,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{file_size}"}
+            )
+        
+        if byte_range is not None:
+            start, end = byte_range
+            headers.update({
+                "Content-Range": f"bytes {start}-{end}/{file_size}",
+                "Content-Length": str(end - start + 1),
+                "Content-Disposition": f'attachment; filename="{filename}"'
+            })
+            return StreamingResponse(
+                iter_file_range(path, start, end),
+                status_code=206,
+                media_type="video/mp4",
+                headers=headers
+            )
+    
+    return FileResponse(
+        path,
+        media_type="video/mp4",
+        filename=filename,
+        stat_result=stat_result,
+        headers=headers
+    )
+
+
 @app.get("/video/{job_id}")
-async def get_video(job_id: str):
+async def get_video(job_id: str, request: Request):
     """Download original video file."""
     
     video_path = f"data/videos/{job_id}.mp4"
     if not os.path.exists(video_path):
         raise HTTPException(status_code=404, detail="Video not found")
     
-    return FileResponse(
-        video_path,
-        media_type="video/mp4",
-        filename=f"{job_id}_original.mp4"
-    )
+    return video_file_response(request, video_path, f"{job_id}_original.mp4")
 
 
 @app.get("/overlay/{job_id}")
-async def get_overlay(job_id: str):
+async def get_overlay(job_id: str, request: Request):
     """Download overlay video file."""
     
     overlay_path = f"data/overlays/{job_id}.mp4"
     if not os.path.exists(overlay_path):
         raise HTTPException(status_code=404, detail="Overlay not found")
     
-    return FileResponse(
-        overlay_path,
-        media_type="video/mp4", 
-        filename=f"{job_id}_overlay.mp4"
-    )
+    return video_file_response(request, overlay_path, f"{job_id}_overlay.mp4")
 
 
 @app.get("/health")
@@ -220,11 +331,24 @@ async def health_check():
 
 
 if __name__ == "__main__":
-    # Development server
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    # Run from backend/ as `python -m app.main`; DEV=1 for the reloading server
+    if os.getenv("DEV"):
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True,
+            log_level="info"
+        )
+    else:
+        # SERVER_WORKERS processes, each analyzing a video at a time; "auto"
+        # picks uvloop where it is installed (not on Windows)
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=SERVER_WORKERS,
+            loop="auto",
+            http="httptools",
+            log_level="info"
+        )
\ No newline at end of file
@@ -0,0 +1,259 @@
+import os
+import uuid
+import json
+import shutil
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import cv2
+import numpy as np
+from numpy.lib.recfunctions import structured_to_unstructured
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; JSON falls back to the stdlib module
+    orjson = None
+
+UPLOAD_CHUNK_SIZE = 1 << 20  # Bytes read per chunk when saving uploads
+DOWNLOAD_CHUNK_SIZE = 1 << 16  # Bytes read per chunk when serving a range
+RESULTS_INDEX_PATH = "data/results/_index.ndjson"  # One summary per line
+RESULTS_INDEX_COMPACT_THRESHOLD = 1000  # Superseded index lines kept before a rewrite
+
+
+def create_job_id() -> str:
+    """Generate a unique job ID."""
+    return str(uuid.uuid4())
+
+
+def ensure_data_dirs(root: str = "."):
+    """Ensure data directories exist under root (the working directory by default)."""
+    os.makedirs(os.path.join(root, "data/videos"), exist_ok=True)
+    os.makedirs(os.path.join(root, "data/overlays"), exist_ok=True) 
+    os.makedirs(os.path.join(root, "data/results"), exist_ok=True)
+
+
+async def save_video_stream(upload_file, job_id: str) -> str:
+    """Stream an uploaded video file to disk in chunks and return path."""
+    ensure_data_dirs()
+    video_path = f"data/videos/{job_id}.mp4"
+    with open(video_path, "wb") as f:
+        while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+            f.write(chunk)
+    return video_path
+
+
+def parse_byte_range(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range HTTP Range header into inclusive (start, end) offsets.
+    
+    Returns None for headers this server does not honor (malformed or
+    multi-range), which callers answer with the whole file. Raises
+    ValueError when the range lies entirely beyond the end of the file.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    
+    start_text, sep, end_text = spec.strip().partition("-")
+    if not sep:
+        return None
+    
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else file_size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(file_size - int(end_text), 0)
+            end = file_size - 1
+    except ValueError:
+        return None
+    
+    if start > end:
+        return None
+    if start >= file_size:
+        raise ValueError("Range not satisfiable")
+    
+    return start, min(end, file_size - 1)
+
+
+def iter_file_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    """Yield the bytes of path from start to end inclusive, in chunks."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def read_json_file(path: str) -> Any:
+    """Parse a JSON file, with orjson when it is installed."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def save_result_json(result: Dict[Any, Any], job_id: str) -> str:
+    """Save analysis result as JSON."""
+    ensure_data_dirs()
+    result_path = f"data/results/{job_id}.json"
+    if orjson is not None:
+        with open(result_path, "wb") as f:
+            f.write(orjson.dumps(
+                result, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+            ))
+    else:
+        with open(result_path, "w") as f:
+            json.dump(result, f, indent=2)
+    return result_path
+
+
+def load_result_json(job_id: str) -> Optional[Dict[Any, Any]]:
+    """Load analysis result from JSON."""
+    result_path = f"data/results/{job_id}.json"
+    if not os.path.exists(result_path):
+        return None
+    
+    return read_json_file(result_path)
+
+
+def _result_index_line(entry: Dict[str, Any]) -> bytes:
+    """Encode one results index entry as a newline-terminated JSON line."""
+    if orjson is not None:
+        return orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(entry) + "\n").encode()
+
+
+def append_result_index(entry: Dict[str, Any]) -> None:
+    """Append one result summary entry to the newline-delimited results index."""
+    ensure_data_dirs()
+    with open(RESULTS_INDEX_PATH, "ab") as f:
+        f.write(_result_index_line(entry))
+
+
+def compact_result_index(entries: List[Dict[str, Any]]) -> None:
+    """
+    Rewrite the results index with only the last entry for each job_id.
+    
+    The new index is written next to the old one and swapped in with
+    os.replace, so readers never see a partial file. A line another worker
+    appends during the rewrite can be lost; /list then re-reads that result
+    file and appends its summary again.
+    """
+    latest = {entry["job_id"]: entry for entry in entries}
+    tmp_path = f"{RESULTS_INDEX_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        for entry in latest.values():
+            f.write(_result_index_line(entry))
+    os.replace(tmp_path, RESULTS_INDEX_PATH)
+
+
+def load_result_index() -> List[Dict[str, Any]]:
+    """Load all entries from the results index; later entries win on replay."""
+    if not os.path.exists(RESULTS_INDEX_PATH):
+        return []
+    
+    loads = orjson.loads if orjson is not None else json.loads
+    entries = []
+    with open(RESULTS_INDEX_PATH, "rb") as f:
+        for line in f:
+            try:
+                entries.append(loads(line))
+            except json.JSONDecodeError:  # orjson's error subclasses this
+                continue  # Skip a partially written trailing line
+    return entries
+
+
+def get_video_info(video_path: str) -> Dict[str, Any]:
+    """Get basic video information."""
+    cap = cv2.VideoCapture(video_path)
+    
+    if not cap.isOpened():
+        return {"error": "Could not open video"}
+    
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    duration = frame_count / fps if fps > 0 else 0
+    
+    cap.release()
+    
+    return {
+        "fps": fps,
+        "frame_count": frame_count,
+        "width": width,
+        "height": height,
+        "duration": duration
+    }
+
+
+def calculate_angles(points_a: np.ndarray, points_b: np.ndarray, points_c: np.ndarray) -> np.ndarray:
+    """Calculate angles (degrees) at points_b for (N, 2) arrays of point triples."""
+    vectors1 = points_a - points_b
+    vectors2 = points_c - points_b
+    
+    norms = np.linalg.norm(vectors1, axis=-1) * np.linalg.norm(vectors2, axis=-1)
+    cos_angles = (vectors1 * vectors2).sum(axis=-1) / norms
+    
+    # Reuse the cosine buffer for every remaining step
+    np.clip(cos_angles, -1.0 + 1e-7, 1.0 - 1e-7, out=cos_angles)
+    np.arccos(cos_angles, out=cos_angles)
+    return np.rad2deg(cos_angles, out=cos_angles)
+
+
+def calculate_angle(point1: np.ndarray, point2: np.ndarray, point3: np.ndarray) -> float:
+    """Calculate angle between three points."""
+    return float(calculate_angles(point1[None], point2[None], point3[None])[0])
+
+
+def compute_frame_mse(frame1: np.ndarray, frame2: np.ndarray) -> float:
+    """Compute MSE between two frames."""
+    if frame1.shape != frame2.shape:
+        return float('inf')
+    
+    # NORM_L2SQR is the sum of squared differences, computed on uint8 directly
+    return cv2.norm(frame1, frame2, cv2.NORM_L2SQR) / frame1.size
+
+
+def landmarks_to_array(landmarks) -> np.ndarray:
+    """
+    Convert landmarks to an (N, 2) float32 array of (x, y).
+    
+    Accepts a sequence of landmark objects with .x and .y attributes, a
+    structured array with x and y fields, or an (N, 2) array.
+    """
+    if isinstance(landmarks, np.ndarray):
+        if landmarks.dtype.names:
+            return structured_to_unstructured(landmarks[['x', 'y']], dtype=np.float32)
+        return landmarks.astype(np.float32, copy=False)
+    
+    return np.fromiter(
+        (c for lm in landmarks for c in (lm.x, lm.y)),
+        dtype=np.float32,
+        count=len(landmarks) * 2
+    ).reshape(-1, 2)
+
+
+def get_centroid(landmarks) -> np.ndarray:
+    """Get centroid of landmarks, given as for landmarks_to_array."""
+    if len(landmarks) == 0:
+        return np.array([0.0, 0.0])
+    
+    if isinstance(landmarks, np.ndarray):
+        # One vectorized mean over the (N, 2) rows, at full input precision
+        if landmarks.dtype.names:
+            landmarks = landmarks_to_array(landmarks)
+        return landmarks.mean(axis=0, dtype=np.float64)
+    
+    # fromiter fills preallocated buffers without building Python lists
+    count = len(landmarks)
+    x_coords = np.fromiter((lm.x for lm in landmarks), dtype=np.float64, count=count)
+    y_coords = np.fromiter((lm.y for lm in landmarks), dtype=np.float64, count=count)
+    
+    return np.array([x_coords.mean(), y_coords.mean()])
\ No newline at end of file
@@ -0,0 +1,21 @@
+"""
+Shared pytest setup for the root test modules.
+Puts the backend and overlay code on the path once per session and exposes
+the backend's app.utils and app.analyze under the short names the tests use.
+"""
+
+import importlib
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path[:0] = [str(ROOT / 'backend'), str(ROOT / 'overlay')]
+
+# analyze imports utils relatively, so both load as the app package (as
+# uvicorn runs them) and are aliased rather than imported top-level
+for name in ('utils', 'analyze'):
+    try:
+        sys.modules.setdefault(name, importlib.import_module(f'app.{name}'))
+    except ImportError:
+        # Tests that need the module fail on their own import instead
+        pass
@@ -6,26 +6,31 @@ Provides video upload, analysis visualization, and overlay generation.
 import streamlit as st
 import cv2
 import numpy as np
-import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+import csv
+import io
 import json
 import os
-import subprocess
 import sys
+import threading
+import uuid
 from pathlib import Path
-from typing import Optional, Dict, Any, List
-import tempfile
-import time
-from PIL import Image
-import plotly.express as px
-import plotly.graph_objects as go
+from typing import Optional, Dict, Any, Iterator, List
+
+try:
+    import av
+except ImportError:  # PyAV is optional; frame extraction falls back to cv2
+    av = None
 
 # Configuration
 BACKEND_URL = "http://localhost:8000"
-OVERLAY_SCRIPT = "../overlay/overlay_generator.py"
+OVERLAY_DIR = "../overlay"
 VIDEO_DATA_DIR = "../backend/data/videos"
 OVERLAY_DATA_DIR = "../backend/data/overlays"
 RESULTS_DATA_DIR = "../backend/data/results"
+UPLOAD_CHUNK_SIZE = 1 << 16  # Bytes sent per chunk when uploading videos
+FORWARD_DECODE_LIMIT = 30  # Decode ahead rather than seek for gaps up to this
 
 # Page config
 st.set_page_config(
@@ -60,28 +65,91 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+@st.cache_resource
+def get_session() -> requests.Session:
+    """Shared keep-alive HTTP session for backend calls, kept across reruns."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
 def check_backend_connection() -> bool:
     """Check if backend is accessible."""
     try:
-        response = requests.get(f"{BACKEND_URL}/health", timeout=5)
+        response = get_session().get(f"{BACKEND_URL}/health", timeout=5)
         return response.status_code == 200
     except:
         return False
 
 
+class MultipartUpload:
+    """
+    multipart/form-data request body that streams its file part in chunks.
+    
+    requests assembles multipart bodies in memory, a second full copy of
+    the video; this yields the form fields, then the file a chunk at a
+    time. Its length is known up front, so the upload is sent with a
+    Content-Length rather than chunked.
+    """
+    
+    def __init__(self, fields: Dict[str, str], file_field: str, filename: str, fileobj, content_type: str):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self._fileobj = fileobj
+        
+        head = b"".join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            for name, value in fields.items()
+        )
+        safe_filename = filename.replace('"', "%22")
+        head += (
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+            f'filename="{safe_filename}"\r\nContent-Type: {content_type}\r\n\r\n'
+        ).encode()
+        self._head = head
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode()
+        
+        # Size of the file part from the current position to the end
+        start = fileobj.tell()
+        self._file_size = fileobj.seek(0, os.SEEK_END) - start
+        fileobj.seek(start)
+    
+    def __len__(self) -> int:
+        return len(self._head) + self._file_size + len(self._tail)
+    
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._head
+        while chunk := self._fileobj.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+        yield self._tail
+
+
 def upload_video_to_backend(video_file, athlete_name: str = "", test_type: str = "pushup") -> Optional[Dict]:
     """Upload video to backend for analysis."""
     try:
-        files = {"file": (video_file.name, video_file.getvalue(), "video/mp4")}
-        data = {
-            "athlete": json.dumps({"name": athlete_name}) if athlete_name else "",
-            "test_type": test_type
-        }
+        video_file.seek(0)
+        body = MultipartUpload(
+            {
+                "athlete": json.dumps({"name": athlete_name}) if athlete_name else "",
+                "test_type": test_type
+            },
+            "file", video_file.name, video_file, "video/mp4"
+        )
         
         with st.spinner("Uploading and analyzing video..."):
-            response = requests.post(f"{BACKEND_URL}/analyze", files=files, data=data, timeout=60)
+            response = get_session().post(
+                f"{BACKEND_URL}/analyze",
+                data=body,
+                headers={"Content-Type": body.content_type},
+                timeout=60
+            )
         
         if response.status_code == 200:
+            # The new result should show up in the lists right away
+            get_backend_results.clear()
             return response.json()
         else:
             st.error(f"Upload failed: {response.text}")
@@ -91,10 +159,11 @@ def upload_video_to_backend(video_file, athlete_name: str = "", test_type: str =
         return None
 
 
+@st.cache_data(ttl=5, show_spinner=False)
 def get_backend_results() -> List[Dict]:
     """Get list of results from backend."""
     try:
-        response = requests.get(f"{BACKEND_URL}/list", timeout=10)
+        response = get_session().get(f"{BACKEND_URL}/list", timeout=10)
         if response.status_code == 200:
             return response.json().get("results", [])
         return []
@@ -102,10 +171,11 @@ def get_backend_results() -> List[Dict]:
         return []
 
 
+@st.cache_data(ttl=30, show_spinner=False)
 def get_result_details(job_id: str) -> Optional[Dict]:
     """Get detailed result for a specific job."""
     try:
-        response = requests.get(f"{BACKEND_URL}/result/{job_id}", timeout=10)
+        response = get_session().get(f"{BACKEND_URL}/result/{job_id}", timeout=10)
         if response.status_code == 200:
             return response.json()
         return None
@@ -113,77 +183,187 @@ def get_result_details(job_id: str) -> Optional[Dict]:
         return None
 
 
+def import_overlay_generator():
+    """Import overlay_generator from OVERLAY_DIR; deferred because it loads MediaPipe."""
+    overlay_dir = os.path.abspath(OVERLAY_DIR)
+    if overlay_dir not in sys.path:
+        sys.path.insert(0, overlay_dir)
+    import overlay_generator
+    return overlay_generator
+
+
+@st.cache_resource(show_spinner=False)
+def get_overlay_pose():
+    """
+    Load the overlay PoseDetector once, with the lock that guards it.
+    
+    Streamlit sessions share cached resources and the pose graph tracks
+    state across frames, so one overlay at a time holds the lock.
+    """
+    return import_overlay_generator().PoseDetector(), threading.Lock()
+
+
 def generate_overlay_for_video(video_path: str, output_path: str) -> bool:
-    """Generate overlay using the overlay generator script."""
+    """Generate overlay in-process with the overlay generator."""
     try:
-        # Check if overlay script exists
-        script_path = Path(OVERLAY_SCRIPT)
-        if not script_path.exists():
-            st.error(f"Overlay generator not found: {script_path}")
+        # Check if overlay generator exists
+        if not (Path(OVERLAY_DIR) / "overlay_generator.py").exists():
+            st.error(f"Overlay generator not found in: {OVERLAY_DIR}")
             return False
         
-        # Run overlay generation
-        cmd = [
-            sys.executable, str(script_path),
-            video_path, output_path,
-            "--sample-rate", "2",
-            "--scale", "0.8"
-        ]
+        generate_overlay = import_overlay_generator().generate_overlay
+        pose, pose_lock = get_overlay_pose()
         
-        with st.spinner("Generating pose overlay..."):
+        with st.spinner("Generating pose overlay..."), pose_lock:
             progress_bar = st.progress(0)
             
-            # Simulate progress (in real implementation, you'd capture stdout)
-            for i in range(100):
-                time.sleep(0.05)
-                progress_bar.progress(i + 1)
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            st.success("Overlay generated successfully!")
-            return True
-        else:
-            st.error(f"Overlay generation failed: {result.stderr}")
-            return False
+            # Inference runs on this thread, so the bar can be updated directly
+            pose.reset()  # Start tracking afresh for this video
+            generate_overlay(
+                video_path, output_path,
+                sample_rate=2,
+                scale=0.8,
+                progress_callback=lambda fraction: progress_bar.progress(min(fraction, 1.0)),
+                pose=pose
+            )
+            progress_bar.progress(1.0)
+        
+        st.success("Overlay generated successfully!")
+        return True
             
     except Exception as e:
         st.error(f"Error generating overlay: {str(e)}")
         return False
 
 
-def extract_frame(video_path: str, frame_number: int) -> Optional[np.ndarray]:
-    """Extract a specific frame from video."""
-    try:
-        cap = cv2.VideoCapture(video_path)
-        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-        ret, frame = cap.read()
-        cap.release()
-        
-        if ret:
-            return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+class VideoFrameReader:
+    """
+    Random access to one video's frames over a decoder that stays open.
+    
+    A frame shortly after the last one read is reached by decoding forward;
+    anything else seeks first. With PyAV the seek goes to the keyframe
+    before the frame's timestamp; otherwise to CAP_PROP_POS_FRAMES.
+    """
+    
+    def __init__(self, video_path: str):
+        self._lock = threading.Lock()  # Streamlit sessions share readers
+        self._last_frame_number = None
+        
+        if av is not None:
+            self._container = av.open(video_path)
+            self._stream = self._container.streams.video[0]
+            self.fps = float(self._stream.average_rate)
+            self._frame_duration = 1 / (self.fps * self._stream.time_base)
+            self._start_pts = self._stream.start_time or 0
+            self.frame_count = self._stream.frames or int(
+                (self._stream.duration or 0) / self._frame_duration
+            )
+            self._frames = None
+        else:
+            self._cap = cv2.VideoCapture(video_path)
+            self.fps = self._cap.get(cv2.CAP_PROP_FPS)
+            self.frame_count = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    
+    def read(self, frame_number: int) -> Optional[np.ndarray]:
+        """Return frame_number as an RGB array, or None past the end."""
+        with self._lock:
+            gap = frame_number - self._last_frame_number if self._last_frame_number is not None else 0
+            decode_forward = 0 < gap <= FORWARD_DECODE_LIMIT
+            
+            if av is not None:
+                return self._read_av(frame_number, decode_forward)
+            return self._read_cv2(frame_number, gap if decode_forward else 0)
+    
+    def _read_av(self, frame_number: int, decode_forward: bool) -> Optional[np.ndarray]:
+        if not decode_forward:
+            target_pts = self._start_pts + int(frame_number * self._frame_duration)
+            self._container.seek(target_pts, stream=self._stream)
+            self._frames = self._container.decode(self._stream)
+        
+        for frame in self._frames:
+            if frame.pts is None:
+                continue
+            current = round((frame.pts - self._start_pts) / self._frame_duration)
+            if current >= frame_number:
+                self._last_frame_number = current
+                return frame.to_ndarray(format="rgb24", src_colorspace="DEFAULT")
+        
+        self._last_frame_number = None
         return None
+    
+    def _read_cv2(self, frame_number: int, gap: int) -> Optional[np.ndarray]:
+        if gap:
+            # Demux past the frames in between without decoding them
+            for _ in range(gap - 1):
+                self._cap.grab()
+        else:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        
+        ret, frame = self._cap.read()
+        if not ret:
+            self._last_frame_number = None
+            return None
+        
+        self._last_frame_number = frame_number
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def get_frame_reader(video_path: str, mtime: float) -> VideoFrameReader:
+    """Open reader for video_path; mtime is part of the key so rewritten files reopen."""
+    return VideoFrameReader(video_path)
+
+
+@st.cache_data(ttl=60, max_entries=128, show_spinner=False)
+def extract_frame(video_path: str, mtime: float, frame_number: int) -> Optional[np.ndarray]:
+    """Extract a specific frame from video; mtime keys the cache as in get_frame_reader."""
+    try:
+        reader = get_frame_reader(video_path, mtime)
+        return reader.read(frame_number)
     except:
         return None
 
 
+def overlay_frame_index(overlay_path: Path, frame_number: int) -> int:
+    """Map an original video frame number to the overlay frame showing it."""
+    # Overlays only contain every sample_rate-th frame of the original
+    sample_rate = 1
+    metadata_path = overlay_path.with_name(f"{overlay_path.stem}_metadata.json")
+    if metadata_path.exists():
+        with open(metadata_path, "r") as f:
+            sample_rate = json.load(f).get("processing_params", {}).get("sample_rate", 1)
+    
+    return max((frame_number + 1) // sample_rate - 1, 0)
+
+
+REPORT_CSV_HEADER = [
+    "Job ID", "Filename", "Athlete", "Test Type", "Total Reps", "Valid Reps",
+    "Posture Score", "Cheat Flag", "Duration (s)", "Frames Processed"
+]
+
+
 def create_report_csv(result_data: Dict) -> str:
     """Create CSV report from analysis results."""
-    report_data = {
-        "Job ID": [result_data.get("job_id", "")],
-        "Filename": [result_data.get("filename", "")],
-        "Athlete": [result_data.get("athlete", {}).get("name", "")],
-        "Test Type": [result_data.get("test_type", "")],
-        "Total Reps": [result_data.get("analysis", {}).get("reps", 0)],
-        "Valid Reps": [result_data.get("analysis", {}).get("valid_reps", 0)],
-        "Posture Score": [result_data.get("analysis", {}).get("posture_score", 0.0)],
-        "Cheat Flag": [result_data.get("analysis", {}).get("cheat_flag", False)],
-        "Duration (s)": [result_data.get("analysis", {}).get("duration", 0.0)],
-        "Frames Processed": [result_data.get("analysis", {}).get("frames_processed", 0)]
-    }
+    analysis = result_data.get("analysis", {})
+    row = [
+        result_data.get("job_id", ""),
+        result_data.get("filename", ""),
+        result_data.get("athlete", {}).get("name", ""),
+        result_data.get("test_type", ""),
+        analysis.get("reps", 0),
+        analysis.get("valid_reps", 0),
+        analysis.get("posture_score", 0.0),
+        analysis.get("cheat_flag", False),
+        analysis.get("duration", 0.0),
+        analysis.get("frames_processed", 0)
+    ]
     
-    df = pd.DataFrame(report_data)
-    return df.to_csv(index=False)
+    # One row doesn't need a DataFrame; csv handles quoting the same way
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(REPORT_CSV_HEADER)
+    writer.writerow(row)
+    return buffer.getvalue()
 
 
 def display_analysis_metrics(analysis: Dict):
@@ -273,6 +453,9 @@ def main():
             test_type = st.selectbox("Exercise Type", ["pushup", "situp"])
         
         if uploaded_file:
+            # uploaded_file shares the upload's bytes copy-on-write, so st.video's
+            # getvalue() and the streamed upload's read()s never copy the video.
+            # Avoid getbuffer() (or spooling to a temp file): either copies it.
             st.video(uploaded_file)
             
             if st.button("Analyze Video", type="primary"):
@@ -318,15 +501,18 @@ def main():
             st.info("No analysis results found. Upload a video to get started!")
             return
         
-        # Results table
+        # Results table; pandas is only needed here, so keep it off the cold start
+        import pandas as pd
+        
         df = pd.DataFrame(results)
         
-        # Add some styling
-        def style_cheat_flag(val):
-            return "background-color: #ffebee" if val else "background-color: #e8f5e8"
+        # Add some styling, one call for the whole column rather than per cell
+        def style_cheat_flag(flags):
+            return np.where(flags.astype(bool),
+                            "background-color: #ffebee", "background-color: #e8f5e8")
         
         if not df.empty:
-            styled_df = df.style.applymap(style_cheat_flag, subset=['cheat_flag'])
+            styled_df = df.style.apply(style_cheat_flag, subset=['cheat_flag'])
             st.dataframe(styled_df, use_container_width=True)
         
         # Detailed view
@@ -394,11 +580,11 @@ def main():
             overlay_path = Path(OVERLAY_DATA_DIR) / f"{job_id}.mp4"
             
             if video_path.exists():
-                # Get video info
-                cap = cv2.VideoCapture(str(video_path))
-                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                cap.release()
+                # Get video info from the reader the frames come from
+                video_mtime = video_path.stat().st_mtime
+                reader = get_frame_reader(str(video_path), video_mtime)
+                total_frames = reader.frame_count
+                fps = reader.fps
                 
                 # Frame slider
                 frame_number = st.slider(
@@ -411,14 +597,18 @@ def main():
                 
                 with col1:
                     st.subheader("Original Frame")
-                    original_frame = extract_frame(str(video_path), frame_number)
+                    original_frame = extract_frame(str(video_path), video_mtime, frame_number)
                     if original_frame is not None:
                         st.image(original_frame, use_column_width=True)
                 
                 with col2:
                     st.subheader("Overlay Frame")
                     if overlay_path.exists():
-                        overlay_frame = extract_frame(str(overlay_path), frame_number)
+                        overlay_frame = extract_frame(
+                            str(overlay_path),
+                            overlay_path.stat().st_mtime,
+                            overlay_frame_index(overlay_path, frame_number)
+                        )
                         if overlay_frame is not None:
                             st.image(overlay_frame, use_column_width=True)
                     else:
@@ -0,0 +1,98 @@
+"""
+Numba-compiled kernels for drawing pose overlays.
+Projecting the 33 landmarks to pixels one at a time in Python costs more
+than the cv2 drawing calls themselves; this does the whole list natively.
+"""
+
+import math
+import numpy as np
+from numba import njit
+
+
+@njit(error_model="numpy")
+def project_landmarks(
+    points: np.ndarray,
+    width: int,
+    height: int,
+    visibility_threshold: float,
+    presence_threshold: float
+):
+    """
+    Pixel coordinates of the landmarks mp_drawing would draw.
+    
+    Matches mp_drawing.draw_landmarks: landmarks below either threshold or
+    outside [0, 1] are skipped, and coordinates are floored and clamped to
+    the last row and column.
+    
+    Args:
+        points: (n, 4) float64 array of x, y, visibility, presence, with 1.0
+            for a visibility or presence the landmark does not set
+        width: Image width in pixels
+        height: Image height in pixels
+        visibility_threshold: Minimum visibility to draw a landmark
+        presence_threshold: Minimum presence to draw a landmark
+    
+    Returns:
+        (n, 2) int64 pixel coordinates and an (n,) bool mask of drawable landmarks
+    """
+    n = points.shape[0]
+    pixels = np.zeros((n, 2), dtype=np.int64)
+    drawable = np.zeros(n, dtype=np.bool_)
+    
+    for i in range(n):
+        x = points[i, 0]
+        y = points[i, 1]
+        if points[i, 2] < visibility_threshold or points[i, 3] < presence_threshold:
+            continue
+        
+        # math.isclose(1, v) with its default rel_tol, as mp_drawing uses
+        # (written so that NaN coordinates are skipped too)
+        if not (x >= 0 and (x <= 1 or abs(1 - x) <= 1e-9 * max(1.0, abs(x)))):
+            continue
+        if not (y >= 0 and (y <= 1 or abs(1 - y) <= 1e-9 * max(1.0, abs(y)))):
+            continue
+        
+        pixels[i, 0] = min(math.floor(x * width), width - 1)
+        pixels[i, 1] = min(math.floor(y * height), height - 1)
+        drawable[i] = True
+    
+    return pixels, drawable
+
+
+@njit
+def paint_stamps(
+    image: np.ndarray,
+    pixels: np.ndarray,
+    drawable: np.ndarray,
+    offsets: np.ndarray,
+    layer_starts: np.ndarray,
+    layer_colors: np.ndarray,
+    layers_per_point: int,
+    first: int,
+    last: int
+) -> None:
+    """
+    Paint pre-rasterized shapes centred on drawable points first..last-1, in place.
+    
+    Point i owns layers i * layers_per_point onwards, painted in order so
+    later layers cover earlier ones. Layer j is the (dy, dx) offsets
+    offsets[layer_starts[j]:layer_starts[j + 1]] in colour layer_colors[j];
+    pixels falling outside the image are skipped.
+    """
+    height = image.shape[0]
+    width = image.shape[1]
+    
+    for i in range(first, last):
+        if not drawable[i]:
+            continue
+        
+        cx = pixels[i, 0]
+        cy = pixels[i, 1]
+        for layer in range(i * layers_per_point, (i + 1) * layers_per_point):
+            for k in range(layer_starts[layer], layer_starts[layer + 1]):
+                y = cy + offsets[k, 0]
+                x = cx + offsets[k, 1]
+                if 0 <= y < height and 0 <= x < width:
+                    image[y, x, 0] = layer_colors[layer, 0]
+                    image[y, x, 1] = layer_colors[layer, 1]
+                    image[y, x, 2] = layer_colors[layer, 2]
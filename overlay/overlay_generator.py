@@ -8,22 +8,112 @@ import numpy as np
 import mediapipe as mp
 import json
 import argparse
+import os
+import queue
 import subprocess
 import sys
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, Callable, List, Tuple, Optional
 from math import degrees, atan2
 
+try:
+    import av
+except ImportError:  # PyAV is optional; cv2 then does the decoding
+    av = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; per-frame scores are then written as text
+    msgpack = None
+
+
+from mediapipe.framework.formats import landmark_pb2
+
+from draw_kernels import paint_stamps, project_landmarks
+from video_encoder import open_video_writer
 
 # MediaPipe drawing utilities
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
 mp_drawing_styles = mp.solutions.drawing_styles
 
+# The landmark style never changes, so build its 33 DrawingSpecs once
+POSE_LANDMARKS_STYLE = mp_drawing_styles.get_default_pose_landmarks_style()
+
+# draw_landmarks' default connection style, and the connections as index pairs
+CONNECTION_STYLE = mp_drawing.DrawingSpec()
+POSE_CONNECTION_PAIRS = list(mp_pose.POSE_CONNECTIONS)
+
+# Per landmark (border radius, radius, thickness, color) as mp_drawing derives
+# them from POSE_LANDMARKS_STYLE; the border circle is white
+LANDMARK_CIRCLES = [
+    (max(spec.circle_radius + 1, int(spec.circle_radius * 1.2)),
+     spec.circle_radius, spec.thickness, spec.color)
+    for _, spec in sorted(POSE_LANDMARKS_STYLE.items())
+]
+
+
+def _circle_stamp(radius: int, thickness: int) -> np.ndarray:
+    """(dy, dx) offsets of the pixels cv2.circle sets around an integer centre."""
+    size = 2 * (radius + thickness) + 1
+    canvas = np.zeros((size, size), dtype=np.uint8)
+    centre = radius + thickness
+    cv2.circle(canvas, (centre, centre), radius, 255, thickness)
+    return np.argwhere(canvas) - centre
+
+
+def _landmark_stamps():
+    """
+    LANDMARK_CIRCLES as paint_stamps layers, plus each landmark's extent.
+    
+    cv2.circle at an integer centre is translation invariant while it stays
+    inside the image, so each circle is rasterized once here and only
+    copied per frame. The extent is how far the landmark's pixels reach
+    from its centre; circles closer than that to an edge are clipped
+    differently by cv2 and are drawn with it instead.
+    """
+    stamps = []
+    colors = []
+    for border_radius, radius, thickness, color in LANDMARK_CIRCLES:
+        stamps.append(_circle_stamp(border_radius, thickness))
+        colors.append(mp_drawing.WHITE_COLOR)
+        stamps.append(_circle_stamp(radius, thickness))
+        colors.append(color)
+    
+    layer_starts = np.cumsum([0] + [len(stamp) for stamp in stamps])
+    extents = np.array([
+        np.abs(np.concatenate(stamps[i:i + 2])).max() for i in range(0, len(stamps), 2)
+    ])
+    return (
+        np.concatenate(stamps).astype(np.int64),
+        layer_starts.astype(np.int64),
+        np.array(colors, dtype=np.uint8)
+    ), extents
+
+
+LANDMARK_STAMPS, LANDMARK_EXTENTS = _landmark_stamps()
+
+
 # Configuration
 DEFAULT_SAMPLE_RATE = 1
 DEFAULT_SCALE = 1.0
 LANDMARK_CONFIDENCE_THRESHOLD = 0.5
+PIPELINE_QUEUE_SIZE = 8  # Frames buffered between pipeline stages
+POSE_BACKENDS = ("cpu", "gpu")  # mp.solutions graph, or a Tasks model on the GPU
+DEFAULT_BACKEND = "cpu"
+# Pose model variants and the mp.solutions model_complexity each maps to
+POSE_MODELS = {"lite": 0, "full": 1, "heavy": 2}
+# mediapipe ships only the full model; lite and heavy are downloaded into
+# site-packages on first use, which fails offline or on a read-only install
+DEFAULT_MODEL = "full"
+RECENT_SCORES_SIZE = 100  # Confidence scores kept in the metadata JSON
+GPU_BATCH_WORKERS = 2  # Concurrent gpu-backend videos, bounded by VRAM not cores
+# FFmpeg decode threads per video. Batches already run a video per core, so
+# a per-core count here would start cores squared threads
+DECODE_THREADS = 2
 
 
 def calculate_angle(a, b, c):
@@ -39,12 +129,338 @@ def calculate_angle(a, b, c):
     return angle
 
 
+class PoseDetector:
+    """
+    Per-video pose inference on the selected backend.
+    
+    "cpu" runs the mp.solutions Pose graph. "gpu" runs a MediaPipe Tasks
+    PoseLandmarker (.task model file) on the GPU delegate in VIDEO mode.
+    Either way detect() returns a NormalizedLandmarkList, so metrics and
+    mp_drawing work unchanged.
+    
+    model picks the lite, full or heavy network: the model_complexity of the
+    cpu graph, or pose_landmarker_<model>.task when no model_path is given.
+    """
+    
+    def __init__(
+        self,
+        backend: str = DEFAULT_BACKEND,
+        model_path: Optional[str] = None,
+        model: str = DEFAULT_MODEL
+    ):
+        if backend not in POSE_BACKENDS:
+            raise ValueError(f"Unknown pose backend: {backend}")
+        if model not in POSE_MODELS:
+            raise ValueError(f"Unknown pose model: {model}")
+        
+        self.backend = backend
+        self.model = model
+        self._pose = None
+        self._landmarker = None
+        # Tasks VIDEO mode needs increasing timestamps for the detector's
+        # lifetime, so each video's timestamps are offset past the last one's
+        self._timestamp_base_ms = 0
+        self._last_timestamp_ms = 0
+        
+        if backend == "gpu":
+            model_path = model_path or f"pose_landmarker_{model}.task"
+            if not os.path.exists(model_path):
+                raise ValueError(f"PoseLandmarker model not found: {model_path}")
+            
+            vision = mp.tasks.vision
+            options = vision.PoseLandmarkerOptions(
+                base_options=mp.tasks.BaseOptions(
+                    model_asset_path=model_path,
+                    delegate=mp.tasks.BaseOptions.Delegate.GPU
+                ),
+                running_mode=vision.RunningMode.VIDEO,
+                num_poses=1,
+                min_pose_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+            self._landmarker = vision.PoseLandmarker.create_from_options(options)
+        else:
+            self._pose = mp_pose.Pose(
+                static_image_mode=False,
+                model_complexity=POSE_MODELS[model],
+                enable_segmentation=False,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+    
+    def detect(self, rgb_frame: np.ndarray, timestamp_ms: int):
+        """Return the pose landmarks in rgb_frame, or None if no pose is found."""
+        if self._pose is not None:
+            return self._pose.process(rgb_frame).pose_landmarks
+        
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+        self._last_timestamp_ms = self._timestamp_base_ms + timestamp_ms
+        result = self._landmarker.detect_for_video(image, self._last_timestamp_ms)
+        if not result.pose_landmarks:
+            return None
+        
+        return landmark_pb2.NormalizedLandmarkList(landmark=[
+            landmark_pb2.NormalizedLandmark(
+                x=lm.x, y=lm.y, z=lm.z, visibility=lm.visibility, presence=lm.presence
+            )
+            for lm in result.pose_landmarks[0]
+        ])
+    
+    def reset(self) -> None:
+        """Forget tracking state so the next detect() starts a new video."""
+        if self._pose is not None:
+            self._pose.reset()
+        else:
+            self._timestamp_base_ms = self._last_timestamp_ms + 1000
+    
+    def close(self) -> None:
+        """Release the underlying MediaPipe graph."""
+        if self._pose is not None:
+            self._pose.close()
+        else:
+            self._landmarker.close()
+
+
+def _iter_frames_cv2(cap, sample_rate: int):
+    """Yield (frame_idx, bgr_frame) for every sample_rate-th frame of cap."""
+    frame_idx = 0
+    
+    while cap.isOpened():
+        # grab() only demuxes; skipped frames are never decoded
+        if not cap.grab():
+            break
+        
+        frame_idx += 1
+        
+        # Sample frames; skipped frames are left out of the output video
+        if frame_idx % sample_rate != 0:
+            continue
+        
+        ret, frame = cap.retrieve()
+        if not ret:
+            break
+        
+        yield frame_idx, frame
+
+
+def _iter_frames_av(input_path: str, sample_rate: int):
+    """
+    PyAV counterpart of _iter_frames_cv2 using FFmpeg's threaded decoder.
+    
+    Every frame is decoded, but FFmpeg's select filter drops the unsampled
+    ones, so only sampled frames reach Python and get converted to BGR.
+    """
+    container = av.open(input_path)
+    try:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"  # Frame and slice threads
+        stream.thread_count = DECODE_THREADS
+        
+        decoded = container.decode(stream)
+        if sample_rate > 1:
+            decoded = _select_every(decoded, stream, sample_rate)
+        
+        for frame_idx, av_frame in enumerate(decoded, 1):
+            # swscale's default matrix, as cv2.VideoCapture uses, so overlays
+            # do not shift colour depending on which decoder ran
+            yield frame_idx * sample_rate, av_frame.to_ndarray(
+                format="bgr24", src_colorspace="DEFAULT"
+            )
+    finally:
+        container.close()
+
+
+def _select_every(decoded, stream, sample_rate: int):
+    """Pass decoded frames through a filter graph keeping every sample_rate-th one."""
+    graph = av.filter.Graph()
+    source = graph.add_buffer(template=stream)
+    # n counts from 0, so this keeps frames sample_rate, 2 * sample_rate, ...
+    # in _iter_frames_cv2's 1-based numbering
+    select = graph.add("select", f"not(mod(n+1\\,{sample_rate}))")
+    sink = graph.add("buffersink")
+    source.link_to(select)
+    select.link_to(sink)
+    graph.configure()
+    
+    for frame in decoded:
+        graph.push(frame)
+        while True:
+            try:
+                yield graph.pull()
+            except (av.BlockingIOError, av.EOFError):
+                break
+
+
+def _decode_frames(
+    frames,
+    out_size: Optional[Tuple[int, int]],
+    frame_queue: queue.Queue,
+    stop_event: threading.Event
+) -> None:
+    """
+    Pipeline stage 1: decode, resize and convert sampled frames.
+    
+    Frames are resized to out_size unless it is None. Pushes
+    (frame_idx, bgr_frame, rgb_frame) tuples onto the queue and a trailing
+    None sentinel once the video is exhausted.
+    """
+    try:
+        for frame_idx, frame in frames:
+            if stop_event.is_set():
+                break
+            
+            # Resize frame if needed
+            if out_size is not None:
+                frame = cv2.resize(frame, out_size)
+            
+            # Convert to RGB for MediaPipe
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            
+            frame_queue.put((frame_idx, frame, rgb_frame))
+    finally:
+        frames.close()
+        frame_queue.put(None)
+
+
+def draw_pose(image: np.ndarray, pose_landmarks) -> None:
+    """
+    Draw pose_landmarks onto image in place, as mp_drawing.draw_landmarks would.
+    
+    Pixel-identical to draw_landmarks with POSE_LANDMARKS_STYLE, but the
+    projection and the landmark circles run as compiled kernels, leaving
+    the connection lines as the only per-call cv2 work.
+    """
+    landmarks = pose_landmarks.landmark
+    points = np.fromiter(
+        (value for lm in landmarks for value in (
+            lm.x, lm.y,
+            lm.visibility if lm.HasField("visibility") else 1.0,
+            lm.presence if lm.HasField("presence") else 1.0
+        )),
+        dtype=np.float64,
+        count=4 * len(landmarks)
+    ).reshape(-1, 4)
+    
+    height, width = image.shape[:2]
+    pixels, drawable = project_landmarks(
+        points, width, height,
+        LANDMARK_CONFIDENCE_THRESHOLD, LANDMARK_CONFIDENCE_THRESHOLD
+    )
+    
+    # Connections first so the landmarks are drawn on top, as draw_landmarks does
+    pixel_list = pixels.tolist()
+    drawable_list = drawable.tolist()
+    for start, end in POSE_CONNECTION_PAIRS:
+        if drawable_list[start] and drawable_list[end]:
+            cv2.line(image, pixel_list[start], pixel_list[end],
+                     CONNECTION_STYLE.color, CONNECTION_STYLE.thickness)
+    
+    # Stamp the landmarks in order, handing the rare ones near an edge to cv2
+    inside = (
+        (pixels >= LANDMARK_EXTENTS[:, None]).all(axis=1)
+        & (pixels[:, 0] < width - LANDMARK_EXTENTS)
+        & (pixels[:, 1] < height - LANDMARK_EXTENTS)
+    )
+    first = 0
+    for idx in np.flatnonzero(drawable & ~inside).tolist():
+        paint_stamps(image, pixels, drawable, *LANDMARK_STAMPS, 2, first, idx)
+        border_radius, radius, thickness, color = LANDMARK_CIRCLES[idx]
+        cv2.circle(image, pixel_list[idx], border_radius, mp_drawing.WHITE_COLOR, thickness)
+        cv2.circle(image, pixel_list[idx], radius, color, thickness)
+        first = idx + 1
+    paint_stamps(image, pixels, drawable, *LANDMARK_STAMPS, 2, first, len(pixel_list))
+
+
+def _draw_overlay(
+    frame: np.ndarray,
+    frame_idx: int,
+    total_frames: int,
+    pose_landmarks,
+    elbow_angle: Optional[float],
+    avg_confidence: Optional[float],
+    show_confidence: bool
+) -> np.ndarray:
+    """
+    Draw form status, landmarks and frame info onto frame in place.
+    
+    Each frame is its own buffer and is not used again after it is written,
+    so no copy is needed.
+    """
+    if pose_landmarks:
+        # Validate push-up form
+        if elbow_angle < 90:
+            form_status = "Improper"
+            color = (0, 0, 255)  # Red for improper form
+        else:
+            form_status = "Proper"
+            color = (0, 255, 0)  # Green for proper form
+        
+        # Draw form status on the overlay
+        cv2.putText(frame, f"Form: {form_status}", (10, 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+        
+        # Draw elbow angle
+        cv2.putText(frame, f"Elbow Angle: {elbow_angle:.1f}", (10, 90),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+        
+        # Draw pose landmarks
+        draw_pose(frame, pose_landmarks)
+        
+        # Add confidence text if requested
+        if show_confidence and avg_confidence is not None:
+            conf_text = f"Confidence: {avg_confidence:.2f}"
+            cv2.putText(frame, conf_text, (10, 30),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    
+    # Add frame info
+    frame_info = f"Frame: {frame_idx}/{total_frames}"
+    cv2.putText(frame, frame_info, (10, frame.shape[0] - 20),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    
+    return frame
+
+
+def _write_frames(
+    out,
+    write_queue: queue.Queue,
+    total_frames: int,
+    show_confidence: bool,
+    errors: List[Exception]
+) -> None:
+    """
+    Pipeline stage 3: draw overlays and encode them until the None sentinel.
+    
+    A failure is recorded in errors rather than raised, and the queue keeps
+    being drained so the inference stage never blocks on a dead writer.
+    """
+    while True:
+        item = write_queue.get()
+        if item is None:
+            break
+        if errors:
+            continue
+        
+        try:
+            frame_idx, frame, pose_landmarks, elbow_angle, avg_confidence = item
+            out.write(_draw_overlay(
+                frame, frame_idx, total_frames, pose_landmarks,
+                elbow_angle, avg_confidence, show_confidence
+            ))
+        except Exception as e:
+            errors.append(e)
+
+
 def generate_overlay(
     input_path: str, 
     output_path: str, 
     sample_rate: int = DEFAULT_SAMPLE_RATE,
     scale: float = DEFAULT_SCALE,
-    show_confidence: bool = True
+    show_confidence: bool = True,
+    backend: str = DEFAULT_BACKEND,
+    model_path: Optional[str] = None,
+    model: str = DEFAULT_MODEL,
+    progress_callback: Optional[Callable[[float], None]] = None,
+    pose: Optional[PoseDetector] = None
 ) -> Dict[str, Any]:
     """
     Generate pose overlay video with MediaPipe landmarks.
@@ -52,22 +468,29 @@ def generate_overlay(
     Args:
         input_path: Path to input video
         output_path: Path to save overlay video
-        sample_rate: Process every Nth frame (1 = all frames)
+        sample_rate: Process every Nth frame (1 = all frames); only processed
+            frames are written, at fps / sample_rate
         scale: Scale factor for processing (1.0 = original size)
         show_confidence: Whether to show confidence scores
+        backend: Pose inference backend, "cpu" or "gpu"
+        model_path: PoseLandmarker .task model for the gpu backend; defaults
+            to pose_landmarker_<model>.task
+        model: Pose model variant, "lite", "full" or "heavy"
+        progress_callback: Called with the fraction of the video processed,
+            on the calling thread
+        pose: Detector to reuse, e.g. across a batch; it is reset rather
+            than closed, and backend, model_path and model are ignored
         
     Returns:
         Dictionary with overlay generation metadata
     """
     
-    # Initialize MediaPipe Pose
-    pose = mp_pose.Pose(
-        static_image_mode=False,
-        model_complexity=1,
-        enable_segmentation=False,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5
-    )
+    # Initialize MediaPipe Pose, or start a new run on the caller's
+    owns_pose = pose is None
+    if owns_pose:
+        pose = PoseDetector(backend, model_path, model)
+    else:
+        pose.reset()
     
     # Open input video
     cap = cv2.VideoCapture(input_path)
@@ -84,125 +507,145 @@ def generate_overlay(
     out_width = int(width * scale)
     out_height = int(height * scale)
     
+    # Only sampled frames are written, so the output plays at fps / sample_rate
+    # to keep the original duration
+    out_fps = fps / sample_rate
+    
     # Setup video writer
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (out_width, out_height))
+    out, codec_name = open_video_writer(output_path, out_fps, (out_width, out_height))
     
     # Processing metrics
     processed_frames = 0
     landmark_detections = 0
-    confidence_scores = []
-    
-    frame_idx = 0
+    # Every score goes to a sidecar file; only a running summary stays in memory.
+    # As a MessagePack stream each score is a 5-byte float32 (read it back with
+    # msgpack.Unpacker), otherwise one decimal per line.
+    if msgpack is not None:
+        scores_path = os.path.splitext(output_path)[0] + "_scores.msgpack"
+        scores_file = open(scores_path, 'wb')
+        pack_score = msgpack.Packer(use_single_float=True).pack
+    else:
+        scores_path = os.path.splitext(output_path)[0] + "_scores.ndjson"
+        scores_file = open(scores_path, 'w')
+        pack_score = "{}\n".format
+    recent_scores = deque(maxlen=RECENT_SCORES_SIZE)
+    n_scores = 0
+    mean_confidence = 0.0
+    proper_frames = 0
     
     print(f"Processing video: {input_path}")
     print(f"Output: {output_path}")
     print(f"Original: {width}x{height} @ {fps}fps, {total_frames} frames")
-    print(f"Output: {out_width}x{out_height}, sample_rate={sample_rate}")
+    print(f"Output: {out_width}x{out_height}, sample_rate={sample_rate}, codec={codec_name}")
     
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        frame_idx += 1
-        
-        # Sample frames
-        if frame_idx % sample_rate != 0:
-            # For non-processed frames, just resize and write
-            if scale != 1.0:
-                frame = cv2.resize(frame, (out_width, out_height))
-            out.write(frame)
-            continue
-        
-        processed_frames += 1
-        
-        # Resize frame if needed
-        if scale != 1.0:
-            frame = cv2.resize(frame, (out_width, out_height))
-        
-        # Convert to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Process pose
-        results = pose.process(rgb_frame)
-        
-        # Draw pose landmarks
-        overlay_frame = frame.copy()
-        
-        if results.pose_landmarks:
-            landmark_detections += 1
-
-            # Extract key landmarks
-            landmarks = results.pose_landmarks.landmark
-            shoulder = [landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].x, 
-                        landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y]
-            elbow = [landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].x, 
-                     landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].y]
-            wrist = [landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].x, 
-                     landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].y]
-
-            # Calculate elbow angle
-            elbow_angle = calculate_angle(shoulder, elbow, wrist)
-
-            # Validate push-up form
-            if elbow_angle < 90:
-                form_status = "Improper"
-                color = (0, 0, 255)  # Red for improper form
-            else:
-                form_status = "Proper"
-                color = (0, 255, 0)  # Green for proper form
-
-            # Draw form status on the overlay
-            cv2.putText(overlay_frame, f"Form: {form_status}", (10, 60),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-
-            # Draw elbow angle
-            cv2.putText(overlay_frame, f"Elbow Angle: {elbow_angle:.1f}", (10, 90),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-
-            # Calculate average landmark confidence
-            landmark_confidences = [
-                lm.visibility for lm in results.pose_landmarks.landmark
-                if hasattr(lm, 'visibility')
-            ]
-            if landmark_confidences:
-                avg_confidence = sum(landmark_confidences) / len(landmark_confidences)
-                confidence_scores.append(avg_confidence)
+    # Decode with PyAV when installed; cap is still used for the properties
+    if av is not None:
+        frames = _iter_frames_av(input_path, sample_rate)
+    else:
+        frames = _iter_frames_cv2(cap, sample_rate)
+    
+    # Three-stage pipeline: decode on one thread, pose inference here, and
+    # drawing plus encoding on another, so the stages overlap
+    frame_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    write_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    stop_event = threading.Event()
+    write_errors = []
+    # Decided once: a scale that rounds back to the source size needs no resize
+    need_resize = (out_width, out_height) != (width, height)
+    decoder = threading.Thread(
+        target=_decode_frames,
+        args=(frames, (out_width, out_height) if need_resize else None,
+              frame_queue, stop_event),
+        daemon=True
+    )
+    writer = threading.Thread(
+        target=_write_frames,
+        args=(out, write_queue, total_frames, show_confidence, write_errors),
+        daemon=True
+    )
+    decoder.start()
+    writer.start()
+    
+    try:
+        while True:
+            item = frame_queue.get()
+            if item is None:
+                break
+            
+            frame_idx, frame, rgb_frame = item
+            processed_frames += 1
+            
+            # Process pose
+            pose_landmarks = pose.detect(rgb_frame, int(frame_idx * 1000 / fps))
+            
+            elbow_angle = None
+            avg_confidence = None
+            if pose_landmarks:
+                landmark_detections += 1
+                
+                # Extract key landmarks
+                landmarks = pose_landmarks.landmark
+                shoulder = [landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].x, 
+                            landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y]
+                elbow = [landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].x, 
+                         landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].y]
+                wrist = [landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].x, 
+                         landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].y]
+                
+                # Calculate elbow angle
+                elbow_angle = calculate_angle(shoulder, elbow, wrist)
+                
+                # Calculate average landmark confidence
+                visibility = np.fromiter(
+                    (lm.visibility for lm in landmarks),
+                    dtype=np.float32,
+                    count=len(landmarks)
+                )
+                if len(visibility):
+                    avg_confidence = float(visibility.mean(dtype=np.float64))
+                    scores_file.write(pack_score(avg_confidence))
+                    recent_scores.append(avg_confidence)
+                    
+                    # Welford running mean
+                    n_scores += 1
+                    mean_confidence += (avg_confidence - mean_confidence) / n_scores
+                    if avg_confidence >= 90:
+                        proper_frames += 1
             
-            # Draw pose landmarks
-            mp_drawing.draw_landmarks(
-                overlay_frame,
-                results.pose_landmarks,
-                mp_pose.POSE_CONNECTIONS,
-                landmark_drawing_spec=mp_drawing_styles.get_default_pose_landmarks_style()
+            write_queue.put(
+                (frame_idx, frame, pose_landmarks, elbow_angle, avg_confidence)
             )
             
-            # Add confidence text if requested
-            if show_confidence and landmark_confidences:
-                conf_text = f"Confidence: {avg_confidence:.2f}"
-                cv2.putText(overlay_frame, conf_text, (10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            # Progress indicator
+            if processed_frames % 30 == 0:
+                progress = (frame_idx / total_frames) * 100
+                print(f"Progress: {progress:.1f}% ({frame_idx}/{total_frames} frames)")
+                if progress_callback is not None:
+                    progress_callback(frame_idx / total_frames)
+    finally:
+        # Unblock the decoder if we stopped early, then flush the writer
+        stop_event.set()
+        while decoder.is_alive():
+            try:
+                frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        decoder.join()
+        write_queue.put(None)
+        writer.join()
+        scores_file.close()
         
-        # Add frame info
-        frame_info = f"Frame: {frame_idx}/{total_frames}"
-        cv2.putText(overlay_frame, frame_info, (10, out_height - 20),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-        
-        out.write(overlay_frame)
-        
-        # Progress indicator
-        if processed_frames % 30 == 0:
-            progress = (frame_idx / total_frames) * 100
-            print(f"Progress: {progress:.1f}% ({frame_idx}/{total_frames} frames)")
+        # Cleanup
+        cap.release()
+        out.release()
+        if owns_pose:
+            pose.close()
     
-    # Cleanup
-    cap.release()
-    out.release()
-    pose.close()
+    if write_errors:
+        raise write_errors[0]
     
     # Calculate summary statistics
-    avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0
+    avg_confidence = mean_confidence if n_scores else 0.0
     detection_rate = landmark_detections / processed_frames if processed_frames > 0 else 0.0
     
     metadata = {
@@ -211,10 +654,14 @@ def generate_overlay(
         "processing_params": {
             "sample_rate": sample_rate,
             "scale": scale,
-            "show_confidence": show_confidence
+            "show_confidence": show_confidence,
+            "backend": pose.backend,
+            "model": pose.model
         },
         "video_info": {
             "fps": fps,
+            "output_fps": out_fps,
+            "codec": codec_name,
             "original_dimensions": [width, height],
             "output_dimensions": [out_width, out_height],
             "total_frames": total_frames,
@@ -225,10 +672,11 @@ def generate_overlay(
             "landmark_detections": landmark_detections,
             "detection_rate": detection_rate,
             "average_confidence": avg_confidence,
-            "confidence_scores": confidence_scores[-100:],  # Keep last 100 for size
+            "confidence_scores": list(recent_scores),  # Keep last 100 for size
+            "scores_path": scores_path,
             "form_validation": {
-                "proper_frames": sum(1 for score in confidence_scores if score >= 90),
-                "improper_frames": sum(1 for score in confidence_scores if score < 90)
+                "proper_frames": proper_frames,
+                "improper_frames": n_scores - proper_frames
             }
         }
     }
@@ -247,23 +695,46 @@ def generate_overlay(
     return metadata
 
 
+# The batch worker process's PoseDetector, built once by _init_worker_pose
+_worker_pose: Optional[PoseDetector] = None
+
+
+def _init_worker_pose(backend: str, model_path: Optional[str], model: str) -> None:
+    """ProcessPoolExecutor initializer: build the worker's one PoseDetector."""
+    global _worker_pose
+    _worker_pose = PoseDetector(backend, model_path, model)
+
+
+def _generate_overlay_in_worker(input_path: str, output_path: str, **kwargs) -> Dict[str, Any]:
+    """Run generate_overlay in a batch worker on its shared PoseDetector."""
+    return generate_overlay(input_path, output_path, pose=_worker_pose, **kwargs)
+
+
 def batch_generate_overlays(
     input_dir: str,
     output_dir: str,
     file_pattern: str = "*.mp4",
+    max_workers: Optional[int] = None,
     **kwargs
 ) -> List[Dict[str, Any]]:
     """
     Generate overlays for multiple videos in a directory.
     
+    Videos are independent, so they are spread over worker processes.
+    Each worker builds one MediaPipe graph and resets it between videos
+    rather than paying graph setup for every file.
+    
     Args:
         input_dir: Directory containing input videos
         output_dir: Directory to save overlay videos
         file_pattern: Glob pattern for input files
-        **kwargs: Additional arguments for generate_overlay
+        max_workers: Worker processes; defaults to one per CPU core, or
+            GPU_BATCH_WORKERS for the gpu backend
+        **kwargs: Additional arguments for generate_overlay; they are sent
+            to the workers, so must be picklable
         
     Returns:
-        List of metadata dictionaries for each processed video
+        List of metadata dictionaries for each processed video, in input order
     """
     
     input_path = Path(input_dir)
@@ -275,23 +746,48 @@ def batch_generate_overlays(
         print(f"No files found matching {file_pattern} in {input_dir}")
         return []
     
-    results = []
+    if max_workers is None:
+        if kwargs.get("backend", DEFAULT_BACKEND) == "gpu":
+            max_workers = GPU_BATCH_WORKERS
+        else:
+            max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(input_files))
+    
+    print(f"Processing {len(input_files)} videos with {max_workers} workers")
     
-    for i, input_file in enumerate(input_files, 1):
-        print(f"\n[{i}/{len(input_files)}] Processing: {input_file.name}")
-        
-        output_file = output_path / f"{input_file.stem}_overlay.mp4"
-        
-        try:
-            metadata = generate_overlay(
+    results_by_file = {}
+    pose_args = (
+        kwargs.pop("backend", DEFAULT_BACKEND),
+        kwargs.pop("model_path", None),
+        kwargs.pop("model", DEFAULT_MODEL)
+    )
+    
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker_pose,
+        initargs=pose_args
+    ) as executor:
+        futures = {
+            executor.submit(
+                _generate_overlay_in_worker,
                 str(input_file),
-                str(output_file),
+                str(output_path / f"{input_file.stem}_overlay.mp4"),
                 **kwargs
-            )
-            results.append(metadata)
-        except Exception as e:
-            print(f"Error processing {input_file}: {e}")
-            continue
+            ): input_file
+            for input_file in input_files
+        }
+        
+        for i, future in enumerate(as_completed(futures), 1):
+            input_file = futures[future]
+            
+            try:
+                results_by_file[input_file] = future.result()
+                print(f"\n[{i}/{len(input_files)}] Finished: {input_file.name}")
+            except Exception as e:
+                print(f"Error processing {input_file}: {e}")
+                continue
+    
+    results = [results_by_file[f] for f in input_files if f in results_by_file]
     
     print(f"\nBatch processing completed: {len(results)}/{len(input_files)} successful")
     return results
@@ -303,15 +799,24 @@ def main():
     parser.add_argument("input", help="Input video file or directory")
     parser.add_argument("output", help="Output video file or directory")
     parser.add_argument("--sample-rate", type=int, default=DEFAULT_SAMPLE_RATE,
-                       help="Process every Nth frame (default: 1)")
+                       help="Process and write every Nth frame (default: 1)")
     parser.add_argument("--scale", type=float, default=DEFAULT_SCALE,
                        help="Scale factor for processing (default: 1.0)")
     parser.add_argument("--no-confidence", action="store_true",
                        help="Don't show confidence scores on overlay")
+    parser.add_argument("--backend", choices=POSE_BACKENDS, default=DEFAULT_BACKEND,
+                       help="Pose inference backend (default: cpu)")
+    parser.add_argument("--model", choices=list(POSE_MODELS), default=DEFAULT_MODEL,
+                       help="Pose model variant (default: full)")
+    parser.add_argument("--model-path",
+                       help="PoseLandmarker .task model for --backend gpu "
+                            "(default: pose_landmarker_<model>.task)")
     parser.add_argument("--batch", action="store_true",
                        help="Process all videos in input directory")
     parser.add_argument("--pattern", default="*.mp4",
                        help="File pattern for batch processing (default: *.mp4)")
+    parser.add_argument("--workers", type=int,
+                       help="Videos processed in parallel in batch mode (default: CPU cores)")
     
     args = parser.parse_args()
     
@@ -322,9 +827,13 @@ def main():
                 args.input,
                 args.output,
                 args.pattern,
+                max_workers=args.workers,
                 sample_rate=args.sample_rate,
                 scale=args.scale,
-                show_confidence=not args.no_confidence
+                show_confidence=not args.no_confidence,
+                backend=args.backend,
+                model_path=args.model_path,
+                model=args.model
             )
             
             # Save batch summary
@@ -344,7 +853,10 @@ def main():
                 args.output,
                 sample_rate=args.sample_rate,
                 scale=args.scale,
-                show_confidence=not args.no_confidence
+                show_confidence=not args.no_confidence,
+                backend=args.backend,
+                model_path=args.model_path,
+                model=args.model
             )
             
     except Exception as e:
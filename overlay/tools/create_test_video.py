@@ -5,9 +5,268 @@ Creates simple animations that can be used for testing the analysis pipeline.
 
 import cv2
 import numpy as np
-import math
 import argparse
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+# The video writer is shared with overlay_generator.py, one directory up
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from video_encoder import open_video_writer
+
+
+# Rendered frames buffered ahead of the video writer
+PIPELINE_QUEUE_SIZE = 8
+
+# Keypoint rows of compute_pushup_keypoints
+PUSHUP_HEAD = 0
+PUSHUP_TORSO_TOP = 1  # Also both shoulders
+PUSHUP_TORSO_BOTTOM = 2
+PUSHUP_LEFT_ELBOW = 3
+PUSHUP_LEFT_HAND = 4
+PUSHUP_RIGHT_ELBOW = 5
+PUSHUP_RIGHT_HAND = 6
+PUSHUP_LEFT_HIP = 7
+PUSHUP_RIGHT_HIP = 8
+PUSHUP_LEFT_KNEE = 9
+PUSHUP_RIGHT_KNEE = 10
+PUSHUP_LEFT_FOOT = 11
+PUSHUP_RIGHT_FOOT = 12
+PUSHUP_KEYPOINTS = 13
+
+# Keypoint rows joined into each polyline of the push-up figure
+PUSHUP_LIMBS = (
+    [PUSHUP_TORSO_TOP, PUSHUP_TORSO_BOTTOM],
+    [PUSHUP_LEFT_HAND, PUSHUP_LEFT_ELBOW, PUSHUP_TORSO_TOP, PUSHUP_RIGHT_ELBOW, PUSHUP_RIGHT_HAND],
+    [PUSHUP_LEFT_HIP, PUSHUP_LEFT_KNEE, PUSHUP_LEFT_FOOT],
+    [PUSHUP_RIGHT_HIP, PUSHUP_RIGHT_KNEE, PUSHUP_RIGHT_FOOT],
+)
+
+# Keypoint rows of compute_situp_keypoints
+SITUP_TORSO_END = 0
+SITUP_HEAD = 1
+SITUP_LEFT_ARM_END = 2
+SITUP_RIGHT_ARM_END = 3
+SITUP_HIP = 4
+SITUP_KEYPOINTS = 5
+
+
+class CounterText:
+    """
+    Draws "<label><count>" as cv2.putText(frame, f"{label}{count}", org,
+    FONT_HERSHEY_SIMPLEX, font_scale, color, thickness) would, by copying
+    glyphs rendered once instead of stroking the text every frame.
+    
+    Each digit is rendered in place after the label and any earlier digits,
+    so it lands on the same sub-pixel advance as in the full string (the
+    font's digits all have the same width). The glyphs are combined with
+    np.maximum, so the text must be drawn over black.
+    """
+    
+    def __init__(self, label: str, org: Tuple[int, int], color: Tuple[int, int, int],
+                 font_scale: float = 0.7, thickness: int = 2):
+        self.label = label
+        self.org = org
+        self.color = color
+        self.font_scale = font_scale
+        self.thickness = thickness
+        
+        # Rows of the frame the text can touch
+        (_, text_height), baseline = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+        self._top = max(org[1] - text_height - 2 * thickness, 0)
+        self._bottom = org[1] + baseline + 2 * thickness
+        
+        self._label_glyph = self._glyph("", label)
+        self._digit_glyphs = {}  # (position, digit) -> glyph
+    
+    def _render(self, text: str) -> np.ndarray:
+        """text drawn on a black strip covering the text rows, from column 0."""
+        text_width = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, self.font_scale, self.thickness)[0][0]
+        strip = np.zeros((self._bottom - self._top, self.org[0] + text_width + 2 * self.thickness, 3), dtype=np.uint8)
+        cv2.putText(strip, text, (self.org[0], self.org[1] - self._top), 
+                   cv2.FONT_HERSHEY_SIMPLEX, self.font_scale, self.color, self.thickness)
+        return strip
+    
+    def _glyph(self, before: str, text: str) -> Tuple[int, np.ndarray]:
+        """(x, pixels) that text adds to the strip when drawn after before."""
+        strip = self._render(before + text)
+        if before:
+            drawn = self._render(before).any(axis=2)
+            strip[:, :drawn.shape[1]][drawn] = 0
+        
+        columns = np.flatnonzero(strip.any(axis=(0, 2)))
+        return int(columns[0]), strip[:, columns[0]:columns[-1] + 1].copy()
+    
+    def draw(self, frame: np.ndarray, count: int) -> None:
+        """Draw the label followed by count onto frame."""
+        # Called for every frame, so the lookups the loops repeat are locals
+        rows = frame[self._top:self._bottom]
+        digit_glyphs = self._digit_glyphs
+        maximum = np.maximum
+        
+        glyphs = [self._label_glyph]
+        for key in enumerate(str(count)):
+            glyph = digit_glyphs.get(key)
+            if glyph is None:
+                position, digit = key
+                glyph = digit_glyphs[key] = self._glyph(self.label + "0" * position, digit)
+            glyphs.append(glyph)
+        
+        for x, pixels in glyphs:
+            region = rows[:, x:x + pixels.shape[1]]
+            maximum(region, pixels, out=region)
+
+
+def _write_pipeline(render_frame: Callable[[int, np.ndarray], np.ndarray], total_frames: int,
+                    frame_shape: tuple, out) -> None:
+    """
+    Write the frames returned by render_frame(frame_idx, buffer) to out.
+    
+    Frames are rendered on a worker thread while this thread encodes them;
+    cv2 drawing and VideoWriter.write both release the GIL, so the two
+    overlap. The bounded queue keeps rendering at most PIPELINE_QUEUE_SIZE
+    frames ahead of the encoder.
+    
+    render_frame draws into a preallocated frame_shape uint8 buffer instead
+    of allocating a frame each time. Buffers rotate through a pool sized so
+    that one is never handed out again while it is still queued or being
+    written (the queue, plus one being written, plus one being rendered).
+    """
+    buffers = [np.zeros(frame_shape, dtype=np.uint8) for _ in range(PIPELINE_QUEUE_SIZE + 2)]
+    frame_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    stop_event = threading.Event()
+    errors = []
+    
+    def produce():
+        try:
+            for frame_idx in range(total_frames):
+                if stop_event.is_set():
+                    break
+                frame_queue.put(render_frame(frame_idx, buffers[frame_idx % len(buffers)]))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            frame_queue.put(None)
+    
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    
+    try:
+        while (frame := frame_queue.get()) is not None:
+            out.write(frame)
+    finally:
+        # Unblock the producer if writing failed, then wait for it
+        stop_event.set()
+        while producer.is_alive():
+            try:
+                frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        producer.join()
+    
+    if errors:
+        raise errors[0]
+
+
+def compute_pushup_keypoints(total_frames: int, width: int, height: int,
+                             pushup_cycles: float) -> np.ndarray:
+    """
+    Stick figure keypoints for every frame of the push-up animation.
+    
+    Returns:
+        (total_frames, PUSHUP_KEYPOINTS, 2) int32 array of (x, y) pixels
+    """
+    center_x, center_y = width // 2, height // 2
+    arm_length = 50
+    
+    # Push-up phase (0 = up, 1 = down)
+    cycle_progress = np.arange(total_frames) / total_frames * pushup_cycles
+    pushup_phase = np.sin(cycle_progress * 2 * np.pi) * 0.5 + 0.5
+    body_offset = (pushup_phase * 30).astype(np.int32)  # Vertical movement
+    
+    # Arms (15-60 degrees)
+    arm_angle = pushup_phase * 45 + 15
+    upper_arm_cos = np.cos(np.radians(arm_angle))
+    upper_arm_sin = np.sin(np.radians(arm_angle))
+    forearm_cos = np.cos(np.radians(arm_angle * 0.8))
+    forearm_sin = np.sin(np.radians(arm_angle * 0.8))
+    
+    shoulder_y = center_y - 80 + body_offset
+    elbow_y = (shoulder_y + arm_length * upper_arm_sin).astype(np.int32)
+    left_elbow_x = (center_x - arm_length * upper_arm_cos).astype(np.int32)
+    right_elbow_x = (center_x + arm_length * upper_arm_cos).astype(np.int32)
+    hand_y = (elbow_y + arm_length * forearm_sin).astype(np.int32)
+    
+    keypoints = np.empty((total_frames, PUSHUP_KEYPOINTS, 2), dtype=np.int32)
+    keypoints[:, PUSHUP_HEAD, 0] = center_x
+    keypoints[:, PUSHUP_HEAD, 1] = center_y - 100 + body_offset
+    keypoints[:, PUSHUP_TORSO_TOP, 0] = center_x
+    keypoints[:, PUSHUP_TORSO_TOP, 1] = shoulder_y
+    keypoints[:, PUSHUP_TORSO_BOTTOM, 0] = center_x
+    keypoints[:, PUSHUP_TORSO_BOTTOM, 1] = center_y + 40 + body_offset
+    keypoints[:, PUSHUP_LEFT_ELBOW, 0] = left_elbow_x
+    keypoints[:, PUSHUP_LEFT_ELBOW, 1] = elbow_y
+    keypoints[:, PUSHUP_LEFT_HAND, 0] = left_elbow_x - arm_length * forearm_cos
+    keypoints[:, PUSHUP_LEFT_HAND, 1] = hand_y
+    keypoints[:, PUSHUP_RIGHT_ELBOW, 0] = right_elbow_x
+    keypoints[:, PUSHUP_RIGHT_ELBOW, 1] = elbow_y
+    keypoints[:, PUSHUP_RIGHT_HAND, 0] = right_elbow_x + arm_length * forearm_cos
+    keypoints[:, PUSHUP_RIGHT_HAND, 1] = hand_y
+    
+    # Legs move half as far as the body (body_offset >= 0, so a shift halves it)
+    leg_offset = body_offset >> 1
+    keypoints[:, PUSHUP_LEFT_HIP, 0] = center_x - 10
+    keypoints[:, PUSHUP_RIGHT_HIP, 0] = center_x + 10
+    keypoints[:, [PUSHUP_LEFT_HIP, PUSHUP_RIGHT_HIP], 1] = (center_y + 40 + body_offset)[:, None]
+    keypoints[:, PUSHUP_LEFT_KNEE, 0] = center_x - 15
+    keypoints[:, PUSHUP_RIGHT_KNEE, 0] = center_x + 15
+    keypoints[:, [PUSHUP_LEFT_KNEE, PUSHUP_RIGHT_KNEE], 1] = (center_y + 80 + leg_offset)[:, None]
+    keypoints[:, PUSHUP_LEFT_FOOT, 0] = center_x - 20
+    keypoints[:, PUSHUP_RIGHT_FOOT, 0] = center_x + 20
+    keypoints[:, [PUSHUP_LEFT_FOOT, PUSHUP_RIGHT_FOOT], 1] = (center_y + 120 + leg_offset)[:, None]
+    
+    return keypoints
+
+
+def compute_situp_keypoints(total_frames: int, hip_x: int, hip_y: int,
+                            situp_cycles: float) -> np.ndarray:
+    """
+    Keypoints for every frame of the sit-up animation; the legs stay put.
+    
+    Returns:
+        (total_frames, SITUP_KEYPOINTS, 2) int32 array of (x, y) pixels
+    """
+    torso_length = 80
+    arm_length = 40
+    
+    cycle_progress = np.arange(total_frames) / total_frames * situp_cycles
+    situp_phase = np.sin(cycle_progress * 2 * np.pi) * 0.5 + 0.5
+    
+    # Torso angle (0 = lying down, 1 = sitting up), 0-60 degrees
+    torso_angle = np.radians(situp_phase * 60)
+    torso_sin = np.sin(torso_angle)
+    torso_cos = np.cos(torso_angle)
+    
+    torso_end_x = (hip_x - torso_length * torso_sin).astype(np.int32)
+    torso_end_y = (hip_y - torso_length * torso_cos).astype(np.int32)
+    
+    keypoints = np.empty((total_frames, SITUP_KEYPOINTS, 2), dtype=np.int32)
+    keypoints[:, SITUP_TORSO_END, 0] = torso_end_x
+    keypoints[:, SITUP_TORSO_END, 1] = torso_end_y
+    keypoints[:, SITUP_HEAD, 0] = torso_end_x - 25 * torso_sin
+    keypoints[:, SITUP_HEAD, 1] = torso_end_y - 25 * torso_cos
+    keypoints[:, SITUP_LEFT_ARM_END, 0] = torso_end_x - arm_length
+    keypoints[:, SITUP_LEFT_ARM_END, 1] = torso_end_y + 10
+    keypoints[:, SITUP_RIGHT_ARM_END, 0] = torso_end_x + arm_length
+    keypoints[:, SITUP_RIGHT_ARM_END, 1] = torso_end_y + 10
+    keypoints[:, SITUP_HIP, 0] = hip_x
+    keypoints[:, SITUP_HIP, 1] = hip_y
+    
+    return keypoints
 
 
 def create_pushup_animation(output_path: str, duration: float = 3.0, fps: int = 30):
@@ -24,88 +283,39 @@ def create_pushup_animation(output_path: str, duration: float = 3.0, fps: int =
     total_frames = int(duration * fps)
     
     # Video writer
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+    out, _ = open_video_writer(output_path, fps, (width, height))
     
     # Animation parameters
-    center_x, center_y = width // 2, height // 2
     pushup_cycles = 2  # Number of push-ups in the video
     
-    for frame_idx in range(total_frames):
-        # Create blank frame
-        frame = np.zeros((height, width, 3), dtype=np.uint8)
-        
-        # Calculate push-up phase (0 = up, 1 = down)
-        cycle_progress = (frame_idx / total_frames) * pushup_cycles
-        pushup_phase = math.sin(cycle_progress * 2 * math.pi) * 0.5 + 0.5
+    # The motion depends only on frame_idx, so compute it for every frame up front
+    keypoints = compute_pushup_keypoints(total_frames, width, height, pushup_cycles)
+    completed_reps = (np.arange(total_frames) / total_frames * pushup_cycles).astype(int).tolist()
+    frame_text = CounterText("Frame: ", (10, 30), (0, 255, 0))
+    reps_text = CounterText("Reps: ", (10, 60), (0, 255, 255))
+    
+    def render_frame(frame_idx: int, frame: np.ndarray) -> np.ndarray:
+        # Clear the reused frame buffer
+        frame.fill(0)
         
         # Body positions (stick figure)
-        body_offset = int(pushup_phase * 30)  # Vertical movement
+        points = keypoints[frame_idx]
         
         # Head
-        head_center = (center_x, center_y - 100 + body_offset)
-        cv2.circle(frame, head_center, 20, (255, 255, 255), 2)
-        
-        # Body (torso)
-        torso_top = (center_x, center_y - 80 + body_offset)
-        torso_bottom = (center_x, center_y + 40 + body_offset)
-        cv2.line(frame, torso_top, torso_bottom, (255, 255, 255), 3)
-        
-        # Arms (varying angle for push-up motion)
-        arm_angle = pushup_phase * 45 + 15  # 15-60 degrees
-        arm_length = 50
-        
-        # Left arm
-        left_shoulder = torso_top
-        left_elbow_x = int(left_shoulder[0] - arm_length * math.cos(math.radians(arm_angle)))
-        left_elbow_y = int(left_shoulder[1] + arm_length * math.sin(math.radians(arm_angle)))
-        left_elbow = (left_elbow_x, left_elbow_y)
-        
-        left_hand_x = int(left_elbow[0] - arm_length * math.cos(math.radians(arm_angle * 0.8)))
-        left_hand_y = int(left_elbow[1] + arm_length * math.sin(math.radians(arm_angle * 0.8)))
-        left_hand = (left_hand_x, left_hand_y)
-        
-        cv2.line(frame, left_shoulder, left_elbow, (255, 255, 255), 3)
-        cv2.line(frame, left_elbow, left_hand, (255, 255, 255), 3)
-        
-        # Right arm
-        right_elbow_x = int(left_shoulder[0] + arm_length * math.cos(math.radians(arm_angle)))
-        right_elbow_y = left_elbow_y
-        right_elbow = (right_elbow_x, right_elbow_y)
-        
-        right_hand_x = int(right_elbow[0] + arm_length * math.cos(math.radians(arm_angle * 0.8)))
-        right_hand_y = left_hand_y
-        right_hand = (right_hand_x, right_hand_y)
+        cv2.circle(frame, tuple(points[PUSHUP_HEAD].tolist()), 20, (255, 255, 255), 2)
         
-        cv2.line(frame, left_shoulder, right_elbow, (255, 255, 255), 3)
-        cv2.line(frame, right_elbow, right_hand, (255, 255, 255), 3)
-        
-        # Legs
-        left_hip = (center_x - 10, torso_bottom[1])
-        right_hip = (center_x + 10, torso_bottom[1])
-        
-        left_knee = (center_x - 15, center_y + 80 + body_offset // 2)
-        right_knee = (center_x + 15, center_y + 80 + body_offset // 2)
-        
-        left_foot = (center_x - 20, center_y + 120 + body_offset // 2)
-        right_foot = (center_x + 20, center_y + 120 + body_offset // 2)
-        
-        cv2.line(frame, left_hip, left_knee, (255, 255, 255), 3)
-        cv2.line(frame, left_knee, left_foot, (255, 255, 255), 3)
-        cv2.line(frame, right_hip, right_knee, (255, 255, 255), 3)
-        cv2.line(frame, right_knee, right_foot, (255, 255, 255), 3)
+        # Torso, arms (varying angle for push-up motion) and legs in one call
+        cv2.polylines(frame, [points[limb] for limb in PUSHUP_LIMBS], False, (255, 255, 255), 3)
         
         # Add frame counter for testing
-        cv2.putText(frame, f"Frame: {frame_idx}", (10, 30), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        frame_text.draw(frame, frame_idx)
         
         # Add push-up counter
-        completed_reps = int(cycle_progress)
-        cv2.putText(frame, f"Reps: {completed_reps}", (10, 60), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        reps_text.draw(frame, completed_reps[frame_idx])
         
-        out.write(frame)
+        return frame
     
+    _write_pipeline(render_frame, total_frames, (height, width, 3), out)
     out.release()
     print(f"Created push-up test video: {output_path}")
 
@@ -124,42 +334,48 @@ def create_tampered_video(output_path: str, duration: float = 3.0, fps: int = 30
     total_frames = int(duration * fps)
     
     # Video writer
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+    out, _ = open_video_writer(output_path, fps, (width, height))
+    
+    # Middle 40% of the video is one frame repeated (cheat detection trigger)
+    duplicate_start = total_frames * 0.3
+    duplicate_end = total_frames * 0.7
+    
+    # Rendered once and written for every duplicate, without the frame
+    # counter so the duplicates are byte-identical
+    duplicate_frame = np.zeros((height, width, 3), dtype=np.uint8)
+    cv2.circle(duplicate_frame, (int(0.3 * width), height // 2), 30, (0, 255, 0), -1)
+    cv2.putText(duplicate_frame, "DUPLICATE FRAMES", (200, 100), 
+               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+    
+    frame_text = CounterText("Frame: ", (10, 30), (255, 255, 255))
     
     # Create a simple animation with intentional duplications
-    for frame_idx in range(total_frames):
-        # Create blank frame
-        frame = np.zeros((height, width, 3), dtype=np.uint8)
+    def render_frame(frame_idx: int, frame: np.ndarray) -> np.ndarray:
+        if duplicate_start <= frame_idx < duplicate_end:
+            return duplicate_frame
+        
+        # Clear the reused frame buffer
+        frame.fill(0)
         
         # Add some movement (circle bouncing)
-        if frame_idx < total_frames * 0.3:
+        if frame_idx < duplicate_start:
             # Normal movement for first 30%
-            x = int((frame_idx / (total_frames * 0.3)) * width)
-            y = height // 2
-        elif frame_idx < total_frames * 0.7:
-            # Duplicate frames for middle 40% (cheat detection trigger)
-            x = int(0.3 * width)
+            x = int((frame_idx / duplicate_start) * width)
             y = height // 2
         else:
             # Resume movement for last 30%
-            progress = (frame_idx - total_frames * 0.7) / (total_frames * 0.3)
+            progress = (frame_idx - duplicate_end) / (total_frames * 0.3)
             x = int(0.3 * width + progress * 0.7 * width)
             y = height // 2
         
         # Draw moving circle
         cv2.circle(frame, (x, y), 30, (0, 255, 0), -1)
         
-        # Add warning text during duplicate section
-        if total_frames * 0.3 <= frame_idx < total_frames * 0.7:
-            cv2.putText(frame, "DUPLICATE FRAMES", (200, 100), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+        frame_text.draw(frame, frame_idx)
         
-        cv2.putText(frame, f"Frame: {frame_idx}", (10, 30), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        
-        out.write(frame)
+        return frame
     
+    _write_pipeline(render_frame, total_frames, (height, width, 3), out)
     out.release()
     print(f"Created tampered test video: {output_path}")
 
@@ -178,77 +394,98 @@ def create_situp_animation(output_path: str, duration: float = 4.0, fps: int = 3
     total_frames = int(duration * fps)
     
     # Video writer
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+    out, _ = open_video_writer(output_path, fps, (width, height))
     
     center_x, center_y = width // 2, height // 2 + 50
     situp_cycles = 2.5
     
-    for frame_idx in range(total_frames):
-        frame = np.zeros((height, width, 3), dtype=np.uint8)
-        
-        # Calculate sit-up phase
-        cycle_progress = (frame_idx / total_frames) * situp_cycles
-        situp_phase = math.sin(cycle_progress * 2 * math.pi) * 0.5 + 0.5
-        
-        # Torso angle (0 = lying down, 1 = sitting up)
-        torso_angle = situp_phase * 60  # 0-60 degrees
-        torso_length = 80
-        
-        # Base position (hips)
-        hip_pos = (center_x, center_y)
+    # The motion depends only on frame_idx, so compute it for every frame up front
+    keypoints = compute_situp_keypoints(total_frames, center_x, center_y, situp_cycles)
+    completed_reps = (np.arange(total_frames) / total_frames * situp_cycles).astype(int).tolist()
+    frame_text = CounterText("Frame: ", (10, 30), (0, 255, 0))
+    situps_text = CounterText("Sit-ups: ", (10, 60), (0, 255, 255))
+    
+    # Legs, hip to knee to foot
+    left_leg = np.array([[center_x - 10, center_y], [center_x - 30, center_y + 60],
+                         [center_x - 35, center_y + 100]], dtype=np.int32)
+    right_leg = np.array([[center_x + 10, center_y], [center_x + 30, center_y + 60],
+                          [center_x + 35, center_y + 100]], dtype=np.int32)
+    
+    # The legs never move, so draw them once and paste their bounding box
+    legs_layer = np.zeros((height, width, 3), dtype=np.uint8)
+    cv2.polylines(legs_layer, [left_leg, right_leg], False, (255, 255, 255), 3)
+    leg_rows, leg_cols = np.nonzero(legs_layer.any(axis=2))
+    legs_box = (slice(leg_rows.min(), leg_rows.max() + 1), slice(leg_cols.min(), leg_cols.max() + 1))
+    legs_patch = legs_layer[legs_box].copy()
+    
+    def render_frame(frame_idx: int, frame: np.ndarray) -> np.ndarray:
+        frame.fill(0)
+        frame[legs_box] = legs_patch
         
-        # Torso position
-        torso_end_x = int(hip_pos[0] - torso_length * math.sin(math.radians(torso_angle)))
-        torso_end_y = int(hip_pos[1] - torso_length * math.cos(math.radians(torso_angle)))
-        torso_end = (torso_end_x, torso_end_y)
-        
-        # Head
-        head_x = int(torso_end[0] - 25 * math.sin(math.radians(torso_angle)))
-        head_y = int(torso_end[1] - 25 * math.cos(math.radians(torso_angle)))
-        head_pos = (head_x, head_y)
+        points = keypoints[frame_idx]
         
         # Draw stick figure
-        cv2.circle(frame, head_pos, 15, (255, 255, 255), 2)  # Head
-        cv2.line(frame, hip_pos, torso_end, (255, 255, 255), 3)  # Torso
-        
-        # Arms
-        arm_length = 40
-        left_arm_end = (torso_end[0] - arm_length, torso_end[1] + 10)
-        right_arm_end = (torso_end[0] + arm_length, torso_end[1] + 10)
-        cv2.line(frame, torso_end, left_arm_end, (255, 255, 255), 2)
-        cv2.line(frame, torso_end, right_arm_end, (255, 255, 255), 2)
+        cv2.circle(frame, tuple(points[SITUP_HEAD].tolist()), 15, (255, 255, 255), 2)  # Head
         
-        # Legs (fixed position)
-        left_knee = (center_x - 30, center_y + 60)
-        right_knee = (center_x + 30, center_y + 60)
-        left_foot = (center_x - 35, center_y + 100)
-        right_foot = (center_x + 35, center_y + 100)
+        # Torso
+        torso = points[[SITUP_HIP, SITUP_TORSO_END]]
+        cv2.polylines(frame, [torso], False, (255, 255, 255), 3)
         
-        cv2.line(frame, (center_x - 10, center_y), left_knee, (255, 255, 255), 3)
-        cv2.line(frame, (center_x + 10, center_y), right_knee, (255, 255, 255), 3)
-        cv2.line(frame, left_knee, left_foot, (255, 255, 255), 3)
-        cv2.line(frame, right_knee, right_foot, (255, 255, 255), 3)
+        # Arms
+        arms = points[[SITUP_LEFT_ARM_END, SITUP_TORSO_END, SITUP_RIGHT_ARM_END]]
+        cv2.polylines(frame, [arms], False, (255, 255, 255), 2)
         
         # Add counters
-        cv2.putText(frame, f"Frame: {frame_idx}", (10, 30), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        
-        completed_reps = int(cycle_progress)
-        cv2.putText(frame, f"Sit-ups: {completed_reps}", (10, 60), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        frame_text.draw(frame, frame_idx)
+        situps_text.draw(frame, completed_reps[frame_idx])
         
-        out.write(frame)
+        return frame
     
+    _write_pipeline(render_frame, total_frames, (height, width, 3), out)
     out.release()
     print(f"Created sit-up test video: {output_path}")
 
 
+VIDEO_CREATORS = {
+    "pushup": create_pushup_animation,
+    "situp": create_situp_animation,
+    "tampered": create_tampered_video,
+}
+
+
+def create_all_videos(output_path: Path, duration: float, fps: int) -> Dict[str, Path]:
+    """
+    Create every test video type at once, one process per video.
+    
+    Each video goes to output_path with its type appended to the stem, e.g.
+    test_video_pushup.mp4. The videos share nothing, so they render and
+    encode in parallel on separate cores.
+    
+    Returns:
+        Output path of each video type
+    """
+    outputs = {
+        video_type: output_path.with_name(f"{output_path.stem}_{video_type}{output_path.suffix}")
+        for video_type in VIDEO_CREATORS
+    }
+    
+    max_workers = min(len(outputs), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(VIDEO_CREATORS[video_type], str(path), duration, fps)
+            for video_type, path in outputs.items()
+        ]
+        for future in futures:
+            future.result()
+    
+    return outputs
+
+
 def main():
     """CLI interface for creating test videos."""
     parser = argparse.ArgumentParser(description="Create test videos for sports analysis")
-    parser.add_argument("--type", choices=["pushup", "situp", "tampered"], 
-                       default="pushup", help="Type of test video to create")
+    parser.add_argument("--type", choices=[*VIDEO_CREATORS, "all"], 
+                       default="pushup", help="Type of test video to create, or all of them")
     parser.add_argument("--output", "-o", default="test_video.mp4", 
                        help="Output video file path")
     parser.add_argument("--duration", "-d", type=float, default=3.0,
@@ -263,14 +500,14 @@ def main():
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
     # Create the requested video type
-    if args.type == "pushup":
-        create_pushup_animation(str(output_path), args.duration, args.fps)
-    elif args.type == "situp":
-        create_situp_animation(str(output_path), args.duration, args.fps)
-    elif args.type == "tampered":
-        create_tampered_video(str(output_path), args.duration, args.fps)
-    
-    print(f"Test video created successfully: {output_path}")
+    if args.type == "all":
+        outputs = create_all_videos(output_path, args.duration, args.fps)
+        for path in outputs.values():
+            print(f"Test video created successfully: {path}")
+    else:
+        VIDEO_CREATORS[args.type](str(output_path), args.duration, args.fps)
+        print(f"Test video created successfully: {output_path}")
+    
     print(f"Duration: {args.duration}s, FPS: {args.fps}, Type: {args.type}")
 
 
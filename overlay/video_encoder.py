@@ -0,0 +1,100 @@
+"""
+H.264 video writing shared by the overlay generator and the test video tool.
+Kept free of MediaPipe so tools/create_test_video.py can import it cheaply.
+"""
+
+import cv2
+import numpy as np
+from fractions import Fraction
+from typing import Dict, Tuple
+
+try:
+    import av
+except ImportError:  # PyAV is optional; cv2's mp4v writer is used instead
+    av = None
+
+
+# H.264 encoders tried in order: NVIDIA, Intel, then x264 in software
+ENCODER_CHAIN = (
+    ("h264_nvenc", {"preset": "p1", "tune": "ll"}),
+    ("h264_qsv", {"preset": "veryfast"}),
+    ("libx264", {"preset": "ultrafast"}),
+)
+
+
+def _encoder_opens(codec_name: str, options: Dict[str, str],
+                   size: Tuple[int, int], rate: Fraction) -> bool:
+    """Return whether codec_name can be opened for size and rate on this machine."""
+    try:
+        codec_context = av.CodecContext.create(codec_name, "w")
+        codec_context.width, codec_context.height = size
+        codec_context.pix_fmt = "yuv420p"
+        codec_context.time_base = 1 / rate
+        codec_context.framerate = rate
+        codec_context.options = dict(options)
+        codec_context.open()
+        return True
+    except (av.FFmpegError, ValueError):
+        # Missing from this FFmpeg build, no device, or odd dimensions
+        return False
+
+
+class VideoEncoder:
+    """
+    H.264 (yuv420p) writer with cv2.VideoWriter's write()/release() interface.
+    
+    Frames go straight into FFmpeg's BGR to YUV conversion and the first
+    encoder in ENCODER_CHAIN that opens, rather than through cv2's
+    single-threaded mp4v encoder, so a GPU encoder is used where there is one.
+    """
+    
+    def __init__(self, output_path: str, fps: float, size: Tuple[int, int]):
+        rate = Fraction(fps).limit_denominator(1001)
+        for codec_name, options in ENCODER_CHAIN:
+            if _encoder_opens(codec_name, options, size, rate):
+                break
+        else:
+            raise ValueError(f"No H.264 encoder can encode {size[0]}x{size[1]} video")
+        
+        self.codec_name = codec_name
+        # Opened by path so FFmpeg's own AVIO buffer batches the muxer's small
+        # packet writes into a handful of write() calls for the whole file
+        self._container = av.open(output_path, "w")
+        try:
+            self._stream = self._container.add_stream(codec_name, rate=rate, options=options)
+            self._stream.width, self._stream.height = size
+            self._stream.pix_fmt = "yuv420p"
+        except Exception:
+            self._container.close()
+            raise
+        self._pts = 0
+    
+    def write(self, frame: np.ndarray) -> None:
+        """Encode one BGR frame."""
+        av_frame = av.VideoFrame.from_ndarray(frame, format="bgr24")
+        av_frame.pts = self._pts
+        self._pts += 1
+        self._container.mux(self._stream.encode(av_frame))
+    
+    def release(self) -> None:
+        """Flush the encoder and finalize the file."""
+        self._container.mux(self._stream.encode(None))
+        self._container.close()
+
+
+def open_video_writer(output_path: str, fps: float, size: Tuple[int, int]):
+    """
+    Open a writer for output_path, returning (writer, codec_name).
+    
+    Prefers H.264 through VideoEncoder and falls back to cv2's mp4v when
+    PyAV is missing or no H.264 encoder opens.
+    """
+    if av is not None:
+        try:
+            writer = VideoEncoder(output_path, fps, size)
+            return writer, writer.codec_name
+        except (av.FFmpegError, ValueError):
+            pass
+    
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    return cv2.VideoWriter(output_path, fourcc, fps, size), "mp4v"
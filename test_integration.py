@@ -9,6 +9,11 @@ import os
 import json
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, as in backend/app/utils.py
+    orjson = None
+
 
 def test_overlay_metadata_structure():
     """Test that overlay metadata has the expected structure."""
@@ -47,6 +52,23 @@ def test_overlay_metadata_structure():
     assert mock_metadata['analysis_results']['average_confidence'] <= 1.0
 
 
+def test_confidence_score_stream():
+    """Test per-frame confidence scores round-trip as a MessagePack stream."""
+    msgpack = pytest.importorskip('msgpack')
+    import io
+    
+    scores = [0.9, 0.8, 0.85, 0.9, 0.0, 1.0]
+    
+    # Written one packed float32 per frame, as generate_overlay does
+    pack_score = msgpack.Packer(use_single_float=True).pack
+    stream = io.BytesIO(b''.join(pack_score(score) for score in scores))
+    assert len(stream.getvalue()) == 5 * len(scores)
+    
+    parsed = list(msgpack.Unpacker(stream))
+    assert len(parsed) == len(scores)
+    assert all(abs(a - b) < 1e-6 for a, b in zip(parsed, scores))
+
+
 def test_test_video_parameters():
     """Test test video creation parameters."""
     # Standard parameters
@@ -83,15 +105,25 @@ def test_json_serialization():
         }
     }
     
-    # Should serialize without error
-    json_str = json.dumps(test_data)
-    
-    # Should deserialize back to same data
-    parsed_data = json.loads(json_str)
-    
-    assert parsed_data == test_data
-    assert isinstance(parsed_data['cheat_flag'], bool)
-    assert isinstance(parsed_data['confidence'], float)
+    # Results are written with orjson when it is installed and read back by
+    # either library, so check each pairing round-trips
+    encoders = [json.dumps]
+    decoders = [json.loads]
+    if orjson is not None:
+        encoders.append(orjson.dumps)
+        decoders.append(orjson.loads)
+    
+    for dumps in encoders:
+        # Should serialize without error
+        encoded = dumps(test_data)
+        
+        for loads in decoders:
+            # Should deserialize back to same data
+            parsed_data = loads(encoded)
+            
+            assert parsed_data == test_data
+            assert isinstance(parsed_data['cheat_flag'], bool)
+            assert isinstance(parsed_data['confidence'], float)
 
 
 def test_file_path_handling():
@@ -200,16 +232,21 @@ def test_timestamp_handling():
     """Test timestamp operations."""
     import time
     
-    # Current timestamp
-    current_time = time.time()
-    assert current_time > 1600000000  # After 2020
+    # Current timestamp, as integer nanoseconds
+    current_time_ns = time.time_ns()
+    assert current_time_ns > 1600000000 * 1_000_000_000  # After 2020
+    
+    # Timestamp differences, measured on the monotonic clock so they are
+    # exact integers and immune to wall-clock adjustments
+    start_ns = time.monotonic_ns()
+    end_ns = start_ns + 5 * 1_000_000_000  # 5 seconds later
+    duration_ns = end_ns - start_ns
     
-    # Timestamp differences
-    start_time = current_time
-    end_time = start_time + 5.0  # 5 seconds later
-    duration = end_time - start_time
+    assert duration_ns == 5_000_000_000
+    assert duration_ns / 1_000_000_000 == 5.0
     
-    assert duration == 5.0
+    # The monotonic clock never goes backwards
+    assert time.monotonic_ns() >= start_ns
 
 
 if __name__ == '__main__':